@@ -1 +1,3 @@
-from .api import run
\ No newline at end of file
+from .api import run
+from .gateway import run as run_gateway
+from .shard import set_shard
\ No newline at end of file
@@ -5,8 +5,12 @@ from uvicorn import Config, Server
 from asyncio import BaseEventLoop
 
 from config import HOST, PORT, API_ROOT_PATH
+from foot_game import shutdown_bots
 
+from .http import close_session
 from .routers import routers
+from .routers.game import game_log
+from .validator import user_store
 
 app = FastAPI(
     version="0.1.0a",
@@ -23,16 +27,21 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.router.on_shutdown.append(close_session)
+app.router.on_shutdown.append(user_store.close)
+app.router.on_shutdown.append(game_log.close)
+app.router.on_shutdown.append(shutdown_bots)
 
 for router in routers:
     app.include_router(router)
 
-async def run(loop: BaseEventLoop):
+async def run(loop: BaseEventLoop, host: str = HOST, port: int = PORT, log_level: str = "info"):
     config = Config(
         app=app,
-        host=HOST,
-        port=PORT,
-        loop=loop
+        host=host,
+        port=port,
+        loop=loop,
+        log_level=log_level
     )
     server = Server(config)
     await server.serve()
@@ -0,0 +1,92 @@
+from aiohttp import web
+
+from asyncio import run, sleep
+from os import urandom
+from sys import argv
+from zlib import crc32
+
+class DiscordStub():
+    expires_in: int = 604800
+    delay: float = 0
+    tokens: dict[str, int] = {}
+    refresh_tokens: dict[str, int] = {}
+    counters: dict[str, int] = {}
+
+    def __init__(self, expires_in: int = 604800, delay: float = 0) -> None:
+        self.expires_in = expires_in
+        self.delay = delay
+        self.tokens = {}
+        self.refresh_tokens = {}
+        self.counters = {
+            "authorization_code": 0,
+            "refresh_token": 0,
+            "users": 0
+        }
+
+    def issue(self, user_id: int) -> dict:
+        access_token = urandom(16).hex()
+        refresh_token = urandom(16).hex()
+        self.tokens[access_token] = user_id
+        self.refresh_tokens[refresh_token] = user_id
+        return {
+            "token_type": "Bearer",
+            "access_token": access_token,
+            "expires_in": self.expires_in,
+            "refresh_token": refresh_token,
+            "scope": "identify"
+        }
+
+    async def token(self, request: web.Request) -> web.Response:
+        await sleep(self.delay)
+        data = await request.post()
+        grant_type = data.get("grant_type")
+        if grant_type == "authorization_code":
+            code = data.get("code", "")
+            user_id = int(code) if code.isdigit() else crc32(code.encode())
+        elif grant_type == "refresh_token":
+            user_id = self.refresh_tokens.pop(data.get("refresh_token"), None)
+            if user_id is None:
+                return web.json_response({"error": "invalid_grant"}, status=400)
+        else:
+            return web.json_response({"error": "unsupported_grant_type"}, status=400)
+        self.counters[grant_type] += 1
+        return web.json_response(self.issue(user_id))
+
+    async def user(self, request: web.Request) -> web.Response:
+        await sleep(self.delay)
+        scheme, _, access_token = request.headers.get("Authorization", "").partition(" ")
+        user_id = self.tokens.get(access_token)
+        if scheme.lower() != "bearer" or user_id is None:
+            return web.json_response({"message": "401: Unauthorized"}, status=401)
+        self.counters["users"] += 1
+        return web.json_response({
+            "id": user_id,
+            "username": f"user{user_id}",
+            "global_name": None,
+            "avatar": None
+        })
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.counters)
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/oauth2/token", self.token)
+        app.router.add_get("/users/@me", self.user)
+        app.router.add_get("/stats", self.stats)
+        return app
+
+async def serve(host: str, port: int, expires_in: int = 604800, delay: float = 0):
+    runner = web.AppRunner(DiscordStub(expires_in, delay).app())
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    while True:
+        await sleep(3600)
+
+if __name__ == "__main__":
+    run(serve(
+        "127.0.0.1",
+        int(argv[1]) if len(argv) > 1 else 8500,
+        int(argv[2]) if len(argv) > 2 else 604800,
+        float(argv[3]) if len(argv) > 3 else 0
+    ))
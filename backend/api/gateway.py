@@ -0,0 +1,149 @@
+from aiohttp import ClientWebSocketResponse, WSMsgType
+from fastapi import APIRouter, FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.websockets import WebSocket, WebSocketState
+from orjson import loads
+from uvicorn import Config, Server
+
+from asyncio import BaseEventLoop, FIRST_COMPLETED, create_task, wait
+from itertools import count
+
+from config import HOST, PORT, API_ROOT_PATH, SHARD_COUNT
+
+from .api import origins
+from .http import close_session, get_session, get_socket_session
+from .matchmaker import list_modes
+from .routers import metrics_router, oauth_router
+from .routers.game import GameSetting
+from .shard import shard_address, shard_of
+from .validator import user_store
+
+app = FastAPI(
+    version="0.1.0a",
+    root_path=API_ROOT_PATH,
+)
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=origins,
+    allow_credentials=False,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+app.router.on_shutdown.append(close_session)
+app.router.on_shutdown.append(user_store.close)
+
+router = APIRouter(
+    prefix="/game",
+    tags=["Game"]
+)
+match_router = APIRouter(
+    prefix="/match",
+    tags=["Match"]
+)
+next_shard = count()
+
+
+@router.get("/shards")
+async def get_shards():
+    return list(map(shard_address, range(SHARD_COUNT)))
+
+
+@router.get("/shards/{room_id}")
+async def get_room_shard(room_id: str):
+    shard = shard_of(room_id)
+    return {
+        "shard": shard,
+        "address": shard_address(shard)
+    }
+
+
+@router.post("")
+async def create_game(data: GameSetting):
+    shard = next(next_shard) % SHARD_COUNT
+    async with get_session().post(
+        f"http://{shard_address(shard)}/game",
+        json=data.model_dump()
+    ) as response:
+        return loads(await response.read())
+
+
+async def forward(ws: WebSocket, upstream: ClientWebSocketResponse):
+    while True:
+        message = await ws.receive()
+        if message["type"] == "websocket.disconnect":
+            break
+        if message.get("text") is not None:
+            await upstream.send_str(message["text"])
+        elif message.get("bytes") is not None:
+            await upstream.send_bytes(message["bytes"])
+
+
+async def backward(ws: WebSocket, upstream: ClientWebSocketResponse):
+    async for message in upstream:
+        if message.type == WSMsgType.TEXT:
+            await ws.send_text(message.data)
+        elif message.type == WSMsgType.BINARY:
+            await ws.send_bytes(message.data)
+
+
+async def proxy(ws: WebSocket, url: str):
+    try:
+        upstream = await get_socket_session().ws_connect(
+            url,
+            protocols=ws.scope.get("subprotocols", [])
+        )
+    except:
+        await ws.accept()
+        await ws.send_json({
+            "type": "REJECT",
+            "data": "房間伺服器無法連線。"
+        })
+        return
+    await ws.accept(subprotocol=upstream.protocol)
+    tasks = [
+        create_task(forward(ws, upstream)),
+        create_task(backward(ws, upstream)),
+    ]
+    _, pending = await wait(tasks, return_when=FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+    await upstream.close()
+    if ws.client_state == WebSocketState.CONNECTED:
+        try:
+            await ws.close()
+        except: pass
+
+
+@router.websocket("/ws/{room_id}")
+async def game_room(room_id: str, ws: WebSocket):
+    await proxy(ws, f"ws://{shard_address(shard_of(room_id))}/game/ws/{room_id}")
+
+
+@router.websocket("/replay/{room_id}")
+async def replay_room(room_id: str, ws: WebSocket, interval: float = 0.5):
+    await proxy(ws, f"ws://{shard_address(shard_of(room_id))}/game/replay/{room_id}?interval={interval}")
+
+
+@match_router.get("/modes")
+async def get_modes():
+    return list_modes()
+
+
+@match_router.websocket("/ws/{mode}")
+async def match_queue(mode: str, ws: WebSocket):
+    await proxy(ws, f"ws://{shard_address(shard_of(mode))}/match/ws/{mode}")
+
+app.include_router(router)
+app.include_router(match_router)
+app.include_router(metrics_router)
+app.include_router(oauth_router)
+
+async def run(loop: BaseEventLoop):
+    config = Config(
+        app=app,
+        host=HOST,
+        port=PORT,
+        loop=loop
+    )
+    server = Server(config)
+    await server.serve()
@@ -0,0 +1,38 @@
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+
+from typing import Optional
+
+from config import HTTP_CONNECTION_LIMIT, HTTP_KEEPALIVE, HTTP_TIMEOUT
+
+session: Optional[ClientSession] = None
+socket_session: Optional[ClientSession] = None
+
+def get_session() -> ClientSession:
+    global session
+    if session is None or session.closed:
+        session = ClientSession(
+            connector=TCPConnector(
+                limit_per_host=HTTP_CONNECTION_LIMIT,
+                keepalive_timeout=HTTP_KEEPALIVE
+            ),
+            timeout=ClientTimeout(total=HTTP_TIMEOUT)
+        )
+    return session
+
+def get_socket_session() -> ClientSession:
+    global socket_session
+    if socket_session is None or socket_session.closed:
+        socket_session = ClientSession(
+            connector=TCPConnector(limit=0),
+            timeout=ClientTimeout(connect=HTTP_TIMEOUT)
+        )
+    return socket_session
+
+async def close_session():
+    global session, socket_session
+    if session is not None:
+        await session.close()
+        session = None
+    if socket_session is not None:
+        await socket_session.close()
+        socket_session = None
@@ -0,0 +1,81 @@
+from fastapi.websockets import WebSocket, WebSocketDisconnect
+from orjson import loads
+from pydantic import ValidationError
+
+from time import monotonic
+from typing import Optional, Union
+
+from config import INBOUND_BURST, INBOUND_RATE, MAX_FRAME_SIZE
+from metrics import Counter
+from schemas.game import InboundMessage, inbound_adapter
+
+counters = {
+    "accepted": 0,
+    "oversized": 0,
+    "rate_limited": 0,
+    "malformed": 0,
+    "invalid": 0
+}
+
+Counter("footgame_inbound_messages_total", "Inbound game messages by outcome.", ("result",), callback=lambda: dict(map(lambda item: ((item[0],), item[1]), counters.items())))
+
+def inbound_stats() -> dict:
+    return dict(counters)
+
+class TokenBucket():
+    rate: float
+    burst: float
+    tokens: float
+    updated: float
+
+    def __init__(self, rate: float = INBOUND_RATE, burst: float = INBOUND_BURST) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = monotonic()
+
+    def take(self) -> bool:
+        now = monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+class InboundDecoder():
+    bucket: TokenBucket
+    max_size: int
+
+    def __init__(self, max_size: int = MAX_FRAME_SIZE) -> None:
+        self.bucket = TokenBucket()
+        self.max_size = max_size
+
+    def decode(self, data: Union[str, bytes, None]) -> Optional[InboundMessage]:
+        if data is None:
+            counters["malformed"] += 1
+            return None
+        if len(data) > self.max_size:
+            counters["oversized"] += 1
+            return None
+        if not self.bucket.take():
+            counters["rate_limited"] += 1
+            return None
+        try:
+            data = loads(data)
+        except:
+            counters["malformed"] += 1
+            return None
+        try:
+            message = inbound_adapter.validate_python(data)
+        except ValidationError:
+            counters["invalid"] += 1
+            return None
+        counters["accepted"] += 1
+        return message
+
+    async def receive(self, ws: WebSocket) -> Optional[InboundMessage]:
+        message = await ws.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+        return self.decode(message.get("text") or message.get("bytes"))
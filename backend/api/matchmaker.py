@@ -0,0 +1,135 @@
+from asyncio import Future, Task, TimerHandle, create_task, gather, get_running_loop, sleep
+from collections import deque
+from time import monotonic
+from typing import Awaitable, Callable, Optional
+
+from config import MATCH_INTERVAL, MATCH_MODES, MatchMode
+from metrics import Counter, Histogram
+from schemas.user import User
+
+ROOM_CHUNK = 128
+
+match_seconds = Histogram("footgame_match_wait_seconds", "Time a queued user waited for a match.")
+room_counter = Counter("footgame_match_rooms_total", "Rooms created by the matchmaker, by mode.", ("mode",))
+
+def mode_info(name: str, mode: MatchMode) -> dict:
+    return {
+        "mode": name,
+        "players": len(mode.start_position),
+        "width": mode.width,
+        "height": mode.height,
+        "bomb_count": mode.bomb_count
+    }
+
+def list_modes() -> list[dict]:
+    return list(map(lambda item: mode_info(*item), MATCH_MODES.items()))
+
+class Ticket():
+    user: User
+    future: Future
+    created: float
+
+    def __init__(self, user: User) -> None:
+        self.user = user
+        self.future = get_running_loop().create_future()
+        self.created = monotonic()
+
+class Matchmaker():
+    mode: str
+    size: int
+    interval: float
+    create: Callable[[list[User]], Awaitable[str]]
+    queue: deque[Ticket]
+    tickets: dict[int, Ticket]
+    handle: Optional[TimerHandle] = None
+    task: Optional[Task] = None
+
+    def __init__(
+        self,
+        mode: str,
+        size: int,
+        create: Callable[[list[User]], Awaitable[str]],
+        interval: float = MATCH_INTERVAL
+    ) -> None:
+        self.mode = mode
+        self.size = max(size, 1)
+        self.interval = interval
+        self.create = create
+        self.queue = deque()
+        self.tickets = {}
+        self.handle = None
+        self.task = None
+
+    def __len__(self) -> int:
+        return len(self.tickets)
+
+    def join(self, user: User) -> Ticket:
+        old = self.tickets.pop(user.id, None)
+        if old is not None:
+            old.future.cancel()
+        ticket = Ticket(user)
+        self.tickets[user.id] = ticket
+        self.queue.append(ticket)
+        self.schedule()
+        return ticket
+
+    def leave(self, ticket: Ticket):
+        if self.tickets.get(ticket.user.id) is ticket:
+            del self.tickets[ticket.user.id]
+        if not ticket.future.done():
+            ticket.future.cancel()
+        if len(self.queue) > 2 * len(self.tickets) + 64:
+            self.queue = deque(filter(lambda ticket: self.tickets.get(ticket.user.id) is ticket, self.queue))
+
+    def schedule(self):
+        if self.handle is not None or self.task is not None or len(self.tickets) < self.size:
+            return
+        self.handle = get_running_loop().call_later(self.interval, self.start)
+
+    def start(self):
+        self.handle = None
+        self.task = create_task(self.match())
+
+    async def create_rooms(self, groups: list[list[Ticket]]):
+        results = await gather(*map(
+            lambda group: self.create(list(map(lambda ticket: ticket.user, group))),
+            groups
+        ), return_exceptions=True)
+        now = monotonic()
+        for group, result in zip(groups, results):
+            if isinstance(result, BaseException):
+                for ticket in group:
+                    if not ticket.future.done():
+                        ticket.future.set_exception(result)
+                continue
+            room_counter.inc(key=(self.mode,))
+            for ticket in group:
+                match_seconds.observe(now - ticket.created)
+                if not ticket.future.done():
+                    ticket.future.set_result(result)
+
+    def take(self) -> list[list[Ticket]]:
+        groups: list[list[Ticket]] = []
+        for _ in range(len(self.tickets) // self.size):
+            group: list[Ticket] = []
+            while len(group) < self.size:
+                ticket = self.queue.popleft()
+                if self.tickets.get(ticket.user.id) is not ticket:
+                    continue
+                del self.tickets[ticket.user.id]
+                group.append(ticket)
+            groups.append(group)
+        if len(self.tickets) == 0:
+            self.queue.clear()
+        return groups
+
+    async def match(self):
+        try:
+            groups = self.take()
+            for index in range(0, len(groups), ROOM_CHUNK):
+                if index > 0:
+                    await sleep(0)
+                await self.create_rooms(groups[index:index + ROOM_CHUNK])
+        finally:
+            self.task = None
+            self.schedule()
@@ -1,7 +1,13 @@
+from .admin import router as admin_router
 from .game import router as game_router
+from .match import router as match_router
+from .metrics import router as metrics_router
 from .oauth import router as oauth_router
 
 routers = [
+    admin_router,
     game_router,
+    match_router,
+    metrics_router,
     oauth_router,
 ]
@@ -0,0 +1,67 @@
+from fastapi import APIRouter, Depends, Request
+from pydantic import BaseModel
+
+from hmac import compare_digest
+from typing import Optional
+
+from config import ADMIN_TOKEN, TRACE_LIMIT, TRACE_THRESHOLD
+from foot_game import Tracer
+
+from ..exceptions import NOT_FOUND, UNAUTHORIZE
+from ..validator import get_header_token
+from .game import RoomManger, room_data
+
+
+class ProfileSetting(BaseModel):
+    enable: bool = True
+    threshold: float = TRACE_THRESHOLD
+    limit: int = TRACE_LIMIT
+
+
+async def verify_admin(request: Request):
+    if not ADMIN_TOKEN:
+        raise NOT_FOUND
+    token = await get_header_token(request)
+    if not compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise UNAUTHORIZE
+
+
+def get_room(room_id: str) -> RoomManger:
+    room = room_data.get(room_id)
+    if room is None:
+        raise NOT_FOUND
+    return room
+
+
+def get_tracer(room_id: str) -> Tracer:
+    tracer = get_room(room_id).tracer
+    if tracer is None:
+        raise NOT_FOUND
+    return tracer
+
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"],
+    dependencies=[Depends(verify_admin)]
+)
+
+
+@router.post("/rooms/{room_id}/profile")
+async def set_profile(room_id: str, data: ProfileSetting) -> Optional[ProfileSetting]:
+    room = get_room(room_id)
+    if not data.enable:
+        room.set_tracer(None)
+        return None
+    room.set_tracer(Tracer(data.threshold, data.limit))
+    return data
+
+
+@router.get("/rooms/{room_id}/traces")
+async def get_traces(room_id: str):
+    return get_tracer(room_id).dump()
+
+
+@router.get("/rooms/{room_id}/traces/chrome")
+async def get_chrome_trace(room_id: str):
+    return get_tracer(room_id).chrome_trace()
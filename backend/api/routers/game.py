@@ -1,13 +1,51 @@
 from fastapi import APIRouter
 from fastapi.websockets import WebSocket, WebSocketDisconnect
+from orjson import dumps, loads
 from pydantic import BaseModel
 
+from asyncio import Future, Lock, Task, create_task, get_running_loop, sleep
+from base64 import b64decode
+from collections import deque
+from contextlib import asynccontextmanager
+from functools import partial
+from itertools import chain
 from os import urandom
-from typing import Optional, Union
+from time import monotonic
+from typing import Awaitable, Callable, Optional, Union
 
-from foot_game import FootGame, Player
+from bus import broadcast_bus
+from config import MATCH_TIMEOUT, NODE_ID
+from foot_game import (
+    COMPACT_PROTOCOL,
+    SETUP,
+    Connection,
+    FootGame,
+    Player,
+    Spectators,
+    Tracer,
+    WireFormat,
+    apply_event,
+    broadcast,
+    decode_setup,
+    encode_setup,
+    is_finished,
+    make_bot,
+    negotiate,
+    queue_stats,
+    replay,
+    setup_game,
+    setup_players,
+    span,
+    think
+)
+from foot_game.timer import Timer, timer_wheel
+from metrics import Gauge
+from schemas.game import InboundMessage, inbound_adapter
 from schemas.user import User
+from store import GameLog, get_room_store
 
+from ..inbound import InboundDecoder, inbound_stats
+from ..shard import is_local
 from ..validator import get_user
 
 
@@ -18,87 +56,322 @@ class GameSetting(BaseModel):
     start_position: list[tuple[int, int]]
 
 
+class RemoteRoom(BaseModel):
+    node: str
+
+
 class RoomManger():
     game: Optional[FootGame] = None
     host: Player
     players: list[Player] = []
+    spectators: Spectators
     setting: GameSetting
+    actions: deque[tuple[Callable[[], Awaitable], Future]]
+    task: Optional[Task] = None
+    batching: bool = False
+    user_changed: bool = False
+    on_flush: Optional[Callable[[], Awaitable[None]]] = None
+    tracer: Optional[Tracer] = None
+    thinking: Optional[Task] = None
+    auto_start: bool = False
+    expiry: Optional[Timer] = None
+    saved: Optional[tuple] = None
+    touched: float = 0
 
-    def __init__(self, user: User, ws: WebSocket, setting: GameSetting) -> None:
+    def __init__(self, user: User, ws: WebSocket, setting: GameSetting, wire: WireFormat = "json") -> None:
         player = Player(
             user=user,
             ws=ws,
         )
+        player._format = wire
         self.game = None
         self.players = list([])
         self.host = player
         self.players.append(player)
+        self.spectators = Spectators()
         self.setting = setting
+        self.tracer = None
+        self.auto_start = False
+        self.expiry = None
+        self.saved = None
+        self.touched = 0
+        self.reset_actor()
 
-    async def broadcast(self, data):
+    def reset_actor(self):
+        self.actions = deque()
+        self.task = None
+        self.batching = False
+        self.user_changed = False
+        self.on_flush = None
+        self.thinking = None
+
+    def submit(self, action: Callable[[], Awaitable]) -> Future:
+        future = get_running_loop().create_future()
+        self.actions.append((action, future))
+        if self.task is None:
+            self.task = create_task(self.run())
+        return future
+
+    async def run(self):
+        await sleep(0)
+        try:
+            while len(self.actions) > 0:
+                batch = list(self.actions)
+                self.actions.clear()
+                with span(self.tracer, "batch", size=len(batch)):
+                    self.set_batching(True)
+                    for action, future in batch:
+                        try:
+                            with span(self.tracer, getattr(action, "func", action).__name__):
+                                result = await action()
+                            if not future.done():
+                                future.set_result(result)
+                        except Exception as e:
+                            if not future.done():
+                                future.set_exception(e)
+                    self.set_batching(False)
+                    try:
+                        with span(self.tracer, "flush"):
+                            await self.flush()
+                    except: pass
+        finally:
+            self.set_batching(False)
+            self.task = None
+
+    def set_batching(self, batching: bool):
+        self.batching = batching
+        if self.game is not None:
+            self.game.batching = batching
+
+    def set_tracer(self, tracer: Optional[Tracer]):
+        self.tracer = tracer
+        if self.game is not None:
+            self.game.tracer = tracer
         for player in self.players:
-            # try:
-                await player.ws.send_json(data)
-            # except RuntimeError: pass
+            player.trace(tracer)
 
-    async def update_user(self):
-        await self.broadcast({
+    async def flush(self):
+        if self.user_changed:
+            self.user_changed = False
+            if self.host is not None and len(self.players) > 0:
+                await self.update_user()
+        if self.game is not None:
+            await self.game.flush()
+        if self.on_flush is not None:
+            await self.on_flush()
+        self.schedule_bot()
+
+    def schedule_bot(self):
+        game = self.game
+        if game is None or game.end or game.now_player is None or not game.now_player.bot:
+            return
+        if self.thinking is None:
+            self.thinking = create_task(self.run_bot(game, game.now_player, game.version))
+
+    async def run_bot(self, game: FootGame, player: Player, version: int):
+        try:
+            x, y, bomb = await think(game, player)
+        except:
+            self.thinking = None
+            return
+        await self.submit(partial(self.play_bot, game, player, version, x, y, bomb))
+
+    async def play_bot(self, game: FootGame, player: Player, version: int, x: int, y: int, bomb: bool):
+        self.thinking = None
+        if self.game is not game or game.now_player is not player or game.version != version:
+            return
+        await game.move(player, x, y, bomb)
+
+    def stop_bot(self):
+        if self.thinking is not None:
+            self.thinking.cancel()
+            self.thinking = None
+
+    @classmethod
+    def restore(cls, data: dict) -> "RoomManger":
+        room = cls.__new__(cls)
+        room.setting = GameSetting.model_validate(data["setting"])
+        room.players = list(map(Player.load_state, data["players"]))
+        room.host = next(filter(lambda player: player.user.id == data["host"], room.players), None)
+        room.game = None if data["game"] is None else FootGame.restore(data["game"], room.players)
+        room.spectators = Spectators()
+        if room.game is not None:
+            room.game.watch(room.spectators)
+        room.auto_start = data.get("auto_start", False)
+        room.expiry = None
+        room.saved = None
+        room.touched = 0
+        room.tracer = None
+        room.reset_actor()
+        return room
+
+    @classmethod
+    def reserve(cls, setting: GameSetting, users: list[User]) -> "RoomManger":
+        room = cls(user=users[0], ws=None, setting=setting)
+        room.players += list(map(lambda user: Player(user=user), users[1:]))
+        room.auto_start = True
+        return room
+
+    @classmethod
+    async def recover(cls, events: list[tuple[int, bytes]]) -> "RoomManger":
+        setup = decode_setup(events[0][1])
+        room = cls.__new__(cls)
+        room.setting = GameSetting.model_validate(setup["setting"])
+        room.players = setup_players(setup)
+        room.game = await replay(setup, events, room.players)
+        room.host = next(filter(lambda player: player.user.id == setup["host"], room.players), None)
+        if room.host is None:
+            room.host = next(filter(lambda player: not player.bot, room.players), None)
+        room.spectators = Spectators()
+        room.game.watch(room.spectators)
+        room.auto_start = False
+        room.expiry = None
+        room.saved = None
+        room.touched = 0
+        room.tracer = None
+        room.reset_actor()
+        return room
+
+    def lifecycle(self) -> tuple:
+        return (
+            None if self.host is None else self.host.user.id,
+            tuple(map(lambda player: player.user.id, self.players)),
+            self.game is not None,
+            self.game is not None and self.game.end
+        )
+
+    def snapshot(self) -> bytes:
+        return dumps({
+            "setting": self.setting.model_dump(),
+            "host": None if self.host is None else self.host.user.id,
+            "players": list(map(lambda player: player.dump_state(), self.players)),
+            "game": None if self.game is None else self.game.snapshot(),
+            "auto_start": self.auto_start,
+            "node": NODE_ID
+        })
+
+    @property
+    def connected(self) -> bool:
+        return len(self.spectators) > 0 or any(map(lambda player: player.connected, self.players))
+
+    async def broadcast(self, data):
+        broadcast(self.players, data)
+        self.spectators.broadcast(data)
+
+    def user_data(self) -> dict:
+        return {
             "type": "USER",
             "data": {
                 "host": self.host.user.id,
                 "users": list(map(lambda player: player.user.model_dump(), self.players)),
             }
-        })
+        }
+
+    async def update_user(self):
+        if self.batching:
+            self.user_changed = True
+            return
+        await self.broadcast(self.user_data())
+
+    async def spectate(self, player: Player):
+        player.send(self.user_data())
+        self.spectators.add(player)
 
     async def start(self, player: Player):
         if self.host == player:
             if self.game is not None:
-                await player.ws.send_json({
+                player.send({
                     "type": "WARNING",
                     "data": "遊戲已經開始了。"
                 })
                 return
             if len(self.players) < 2:
-                await player.ws.send_json({
+                player.send({
                     "type": "WARNING",
                     "data": "房間人數不足。"
                 })
                 return
             self.game = FootGame(
                 **self.setting.model_dump(), players=self.players)
-            await player.ws.send_json({
+            self.game.batching = self.batching
+            self.game.tracer = self.tracer
+            self.game.watch(self.spectators)
+            player.send({
                 "type": "INFO",
                 "data": "遊戲開始。"
             })
             await self.game.next_round()
         else:
-            await player.ws.send_json({
+            player.send({
                 "type": "WARNING",
                 "data": "你不是房主。"
             })
 
-    async def join(self, user: User, ws: WebSocket) -> Optional[Player]:
+    async def add_bot(self, player: Player):
+        if self.host != player:
+            player.send({
+                "type": "WARNING",
+                "data": "你不是房主。"
+            })
+            return
         if self.game is not None:
-            await ws.send_json({
-                "type": "REJECT",
+            player.send({
+                "type": "WARNING",
                 "data": "遊戲已經開始了。"
             })
             return
-        elif user.id in filter(lambda player: player.user.id, self.players):
-            await ws.send_json({
+        if len(list(filter(lambda player: not player.observer, self.players))) >= len(self.setting.start_position):
+            player.send({
+                "type": "WARNING",
+                "data": "房間已經滿了。"
+            })
+            return
+        bot = make_bot(len(list(filter(lambda player: player.bot, self.players))) + 1)
+        self.players.append(bot)
+        await self.broadcast({
+            "type": "INFO",
+            "data": f"{bot.user.display_name} 加入遊戲。"
+        })
+        await self.update_user()
+
+    async def reject(self, player: Player, message: str):
+        if player.ws is None:
+            player.send({
+                "type": "REJECT",
+                "data": message
+            })
+        else:
+            await player.ws.send_json({
                 "type": "REJECT",
-                "data": "你已經在遊戲裡了。"
+                "data": message
             })
+
+    async def join(self, user: User, ws: Optional[WebSocket], channel: Optional[str] = None, wire: WireFormat = "json") -> Optional[Player]:
+        player = next(filter(lambda player: player.user.id == user.id and not player.connected, self.players), None)
+        if player is not None:
+            player.attach(ws, channel, wire)
+            player.trace(self.tracer)
+            if self.host is None:
+                self.host = player
+            await self.update_user()
+            if self.game is not None:
+                await self.game.send_snapshot(player)
+            return player
+        player = Player(
+            user=user,
+            ws=ws
+        )
+        player._channel = channel
+        player._format = wire
+        if any(map(lambda player: player.user.id == user.id, self.players)):
+            await self.reject(player, "你已經在遊戲裡了。")
             return
+        elif self.game is not None or len(list(filter(lambda player: not player.observer, self.players))) >= len(self.setting.start_position):
+            await self.spectate(player)
+            return player
         else:
-            player = Player(
-                user=user,
-                ws=ws
-            )
-            if len(list(filter(lambda player: not player.observer, self.players))) >= len(self.setting.start_position):
-                player.observer = True
-                player.live = False
             self.players.append(player)
+            player.trace(self.tracer)
             await self.broadcast({
                 "type": "INFO",
                 "data": f"{user.display_name} 加入遊戲。"
@@ -112,12 +385,10 @@ class RoomManger():
         else:
             await self.game.exit(player)
 
-        if self.host == player and len(self.players) > 0:
-            self.host = self.players[0]
-        elif len(self.players) == 0:
-            self.host = None
+        if self.host == player:
+            self.host = next(filter(lambda player: not player.bot, self.players), None)
 
-        if len(self.players) == 0:
+        if self.host is None:
             return
 
         await self.broadcast({
@@ -131,24 +402,333 @@ router = APIRouter(
     prefix="/game",
     tags=["Game"]
 )
-room_data: dict[str, Union[RoomManger, GameSetting]] = {}
+room_data: dict[str, RoomManger] = {}
+room_inboxes: dict[str, partial] = {}
+room_locks: dict[str, tuple[Lock, int]] = {}
+room_store = get_room_store()
+game_log = GameLog()
+Gauge("footgame_rooms", "Rooms open on this node.", callback=lambda: len(room_data))
+Gauge("footgame_games", "Rooms with a game in progress.", callback=lambda: sum(map(lambda room: room.game is not None and not room.game.end, room_data.values())))
+Gauge("footgame_players", "Players seated in open rooms.", callback=lambda: sum(map(lambda room: len(room.players), room_data.values())))
+Gauge("footgame_spectators", "Spectators watching rooms on this node.", callback=lambda: sum(map(lambda room: len(room.spectators), room_data.values())))
+Gauge("footgame_room_actors", "Room actors currently draining actions.", callback=lambda: sum(map(lambda room: room.task is not None, room_data.values())))
+
+
+def new_room_id() -> str:
+    key = urandom(32).hex()
+    while not is_local(key):
+        key = urandom(32).hex()
+    return key
+
+
+async def open_room(room_id: str, room: RoomManger):
+    room_data[room_id] = room
+    room.on_flush = partial(flush_room, room_id, room)
+    if room.game is not None:
+        room.game.on_timeout = partial(expire_turn, room)
+        room.game.recorder = partial(game_log.append, room_id)
+    inbox = partial(handle_inbox, room_id)
+    room_inboxes[room_id] = inbox
+    await broadcast_bus.subscribe(f"room:{room_id}", inbox)
+    room.schedule_bot()
+
+
+async def close_room(room_id: str):
+    room = room_data.pop(room_id)
+    room.stop_bot()
+    timer_wheel.cancel(room.expiry)
+    room.spectators.stop()
+    if room.game is not None:
+        room.game.stop()
+    inbox = room_inboxes.pop(room_id, None)
+    if inbox is not None:
+        await broadcast_bus.unsubscribe(f"room:{room_id}", inbox)
+    await game_log.release(room_id)
+
+
+@asynccontextmanager
+async def room_lock(room_id: str):
+    lock, count = room_locks.get(room_id, (None, 0))
+    if lock is None:
+        lock = Lock()
+    room_locks[room_id] = (lock, count + 1)
+    try:
+        async with lock:
+            yield
+    finally:
+        lock, count = room_locks[room_id]
+        if count == 1:
+            del room_locks[room_id]
+        else:
+            room_locks[room_id] = (lock, count - 1)
+
+
+async def load_room(room_id: str, default: Optional[GameSetting] = None) -> Union[RoomManger, GameSetting, RemoteRoom, None]:
+    room = room_data.get(room_id)
+    if room is not None:
+        return room
+    data = await room_store.get(room_id)
+    data = None if data is None else loads(data)
+    if data is not None and len(data["players"]) > 0 and data.get("node", NODE_ID) != NODE_ID and await broadcast_bus.is_subscribed(f"room:{room_id}"):
+        return RemoteRoom(node=data["node"])
+    events = await game_log.read(room_id)
+    if len(events) > 0 and not is_finished(events) and (
+        data is None or data["game"] is None or data["game"].get("events", 0) < len(events)
+    ):
+        room = await RoomManger.recover(events)
+    elif data is None:
+        return default
+    elif len(data["players"]) == 0:
+        return GameSetting.model_validate(data["setting"])
+    else:
+        room = RoomManger.restore(data)
+    await open_room(room_id, room)
+    return room
+
+
+async def save_room(room_id: str, room: RoomManger):
+    room.saved = room.lifecycle()
+    room.touched = monotonic()
+    await room_store.set(room_id, room.snapshot())
+
+
+async def flush_room(room_id: str, room: RoomManger):
+    if room_data.get(room_id) is not room:
+        return
+    if room.saved != room.lifecycle():
+        await save_room(room_id, room)
+        if room.game is not None and room.game.end:
+            await game_log.release(room_id)
+    elif monotonic() - room.touched >= room_store.ttl / 2:
+        room.touched = monotonic()
+        await room_store.touch(room_id)
+
+
+async def expire_turn(room: RoomManger, player: Player, deadline: float):
+    game = room.game
+    await room.submit(partial(game.timeout, player, deadline))
+
+
+async def join_room(room_id: str, room: RoomManger, user: User, ws: Optional[WebSocket], channel: Optional[str] = None, wire: WireFormat = "json") -> Optional[Player]:
+    if room_data.get(room_id) is not room:
+        player = Player(
+            user=user,
+            ws=ws
+        )
+        player._channel = channel
+        await room.reject(player, "房間不存在。")
+        return None
+    player = await room.join(user, ws, channel, wire)
+    if room.auto_start and room.game is None and all(map(lambda other: other.connected, room.players)):
+        await start_room(room_id, room, room.host)
+    return player
+
+
+async def start_room(room_id: str, room: RoomManger, player: Player):
+    started = room.game is None
+    await room.start(player)
+    if room.game is not None:
+        room.game.on_timeout = partial(expire_turn, room)
+        if started:
+            room.auto_start = False
+            timer_wheel.cancel(room.expiry)
+            room.expiry = None
+            record_game(room_id, room)
+
+
+async def reserve_room(setting: GameSetting, users: list[User]) -> str:
+    room_id = new_room_id()
+    room = RoomManger.reserve(setting, users)
+    await open_room(room_id, room)
+    await save_room(room_id, room)
+    room.expiry = timer_wheel.schedule(MATCH_TIMEOUT, partial(expire_reservation, room_id, room))
+    return room_id
+
+
+async def expire_reservation(room_id: str, room: RoomManger):
+    await room.submit(partial(drop_absent, room_id, room))
+
+
+async def drop_absent(room_id: str, room: RoomManger):
+    room.expiry = None
+    if room_data.get(room_id) is not room or room.game is not None:
+        return
+    room.auto_start = False
+    for player in list(filter(lambda player: not player.connected, room.players)):
+        await room.exit(player)
+    if room.host is None:
+        await close_room(room_id)
+        await room_store.delete(room_id)
+        return
+    await save_room(room_id, room)
+    if len(room.players) >= 2:
+        await start_room(room_id, room, room.host)
+
+
+async def handle_message(room_id: str, room: RoomManger, player: Player, message: InboundMessage):
+    if message.type == "START":
+        await start_room(room_id, room, player)
+    elif message.type == "BOT":
+        await room.add_bot(player)
+    elif message.type == "MOVE":
+        if room.game is None:
+            player.send({
+                "type": "WARNING",
+                "data": "遊戲尚未開始。"
+            })
+            return
+        await room.game.move(
+            player,
+            target_x=message.data.x,
+            target_y=message.data.y,
+            bomb=message.data.bomb
+        )
+    elif message.type == "RESYNC":
+        if room.game is None:
+            return
+        if player in room.spectators:
+            room.spectators.snapshot(player)
+        else:
+            await room.game.send_snapshot(player)
+
+
+def record_game(room_id: str, room: RoomManger):
+    game = room.game
+    game.recorder = partial(game_log.append, room_id)
+    game.record(SETUP, encode_setup(room.setting.model_dump(), room.host, room.players, game.now_player))
+
+
+async def leave_room(room_id: str, room: RoomManger, player: Player):
+    player.close()
+    if room.spectators.remove(player):
+        if not room.connected:
+            await close_room(room_id)
+        return
+    await room.exit(player)
+    if room.host is None or len(room.players) == 0:
+        await close_room(room_id)
+        await room_store.delete(room_id)
+    else:
+        await save_room(room_id, room)
+        if not room.connected:
+            await close_room(room_id)
+
+
+async def handle_envelope(room_id: str, room: RoomManger, message: dict):
+    if message["type"] == "JOIN":
+        await join_room(room_id, room, User.model_validate(message["user"]), None, message["channel"], message.get("format", "json"))
+        return
+    player = next(filter(lambda player: player._channel == message["channel"], chain(room.players, room.spectators)), None)
+    if player is None:
+        return
+    if message["type"] == "MESSAGE":
+        await handle_message(room_id, room, player, inbound_adapter.validate_python(message["data"]))
+    elif message["type"] == "LEAVE":
+        await leave_room(room_id, room, player)
+
+
+def discard_result(future: Future):
+    if not future.cancelled():
+        future.exception()
+
+
+async def handle_inbox(room_id: str, messages: list):
+    room = room_data.get(room_id)
+    if room is None:
+        return
+    for message in messages:
+        room.submit(partial(handle_envelope, room_id, room, message)).add_done_callback(discard_result)
+
+
+async def relay_room(room_id: str, user: User, ws: WebSocket, wire: WireFormat = "json"):
+    channel = f"player:{room_id}:{user.id}:{NODE_ID}:{urandom(4).hex()}"
+    inbox = f"room:{room_id}"
+    connection = Connection(ws)
+    decoder = InboundDecoder()
+
+    async def deliver(messages: list):
+        for frame_type, payload, *binary in messages:
+            connection.put(frame_type, b64decode(payload) if binary else payload)
+
+    await broadcast_bus.subscribe(channel, deliver)
+    broadcast_bus.publish(inbox, {
+        "type": "JOIN",
+        "user": user.model_dump(),
+        "channel": channel,
+        "format": wire
+    })
+    try:
+        while True:
+            message = await decoder.receive(ws)
+            if message is None:
+                continue
+            broadcast_bus.publish(inbox, {
+                "type": "MESSAGE",
+                "channel": channel,
+                "data": message.model_dump()
+            })
+    except WebSocketDisconnect:
+        pass
+    finally:
+        broadcast_bus.publish(inbox, {
+            "type": "LEAVE",
+            "channel": channel
+        })
+        await broadcast_bus.unsubscribe(channel, deliver)
+        connection.close()
+
+
+@router.get("/queues")
+async def get_queue_stats():
+    return queue_stats()
+
+
+@router.get("/inbound")
+async def get_inbound_stats():
+    return inbound_stats()
 
 
 @router.post("")
 async def create_game(data: GameSetting):
-    key = urandom(32).hex()
-    room_data[key] = data
+    key = new_room_id()
+    await room_store.set(key, dumps({
+        "setting": data.model_dump(),
+        "host": None,
+        "players": [],
+        "game": None
+    }))
     return key
 
 
 @router.websocket("/ws/{room_id}")
 async def game_room(room_id: str, ws: WebSocket):
-    await ws.accept()
+    wire = negotiate(ws)
+    await ws.accept(subprotocol=COMPACT_PROTOCOL if wire == "compact" else None)
+    if not room_id.isalnum():
+        await ws.send_json({
+            "type": "REJECT",
+            "data": "房間不存在。"
+        })
+        return
+    if not is_local(room_id):
+        await ws.send_json({
+            "type": "REJECT",
+            "data": "房間不在此伺服器。"
+        })
+        return
     token = await ws.receive_text()
     user = get_user(token)
 
-    room = room_data.get(room_id, GameSetting(
-        width=3, height=12, bomb_count=3, start_position=[[1, 0], [1, 11]]))
+    player = None
+    async with room_lock(room_id):
+        room = await load_room(room_id, GameSetting(
+            width=3, height=12, bomb_count=3, start_position=[[1, 0], [1, 11]]))
+        if type(room) == GameSetting:
+            room = RoomManger(user=user, ws=ws, setting=room, wire=wire)
+            await open_room(room_id, room)
+            await room.update_user()
+            await save_room(room_id, room)
+            player = room.players[-1]
     if room is None:
         await ws.send_json({
             "type": "REJECT",
@@ -156,40 +736,74 @@ async def game_room(room_id: str, ws: WebSocket):
         })
         return
 
-    if type(room) == GameSetting:
-        room = RoomManger(user=user, ws=ws, setting=room)
-        room_data[room_id] = room
-        await room.update_user()
-        player = room.players[-1]
-    elif type(room) == RoomManger:
-        player = await room.join(user, ws)
+    if type(room) == RoomManger:
+        if player is None:
+            player = await room.submit(partial(join_room, room_id, room, user, ws, None, wire))
         if player is None:
             return
+    elif type(room) == RemoteRoom:
+        await relay_room(room_id, user, ws, wire)
+        return
     else:
         return
 
+    decoder = InboundDecoder()
     try:
         while True:
-            try:
-                data = await ws.receive_json()
-                if data["type"] == "START":
-                    await room.start(player)
-                elif data["type"] == "MOVE":
-                    if room.game is None:
-                        await ws.send_json({
-                            "type": "WARNING",
-                            "data": "遊戲尚未開始。"
-                        })
-                        continue
-                    await room.game.move(
-                        player,
-                        target_x=data["data"]["x"],
-                        target_y=data["data"]["y"],
-                        bomb=data["data"]["bomb"]
-                    )
-            except WebSocketDisconnect as e: raise e
-            except: pass
+            message = await decoder.receive(ws)
+            if message is None:
+                continue
+            await room.submit(partial(handle_message, room_id, room, player, message))
     except WebSocketDisconnect:
-        await room.exit(player)
-        if room.host is None or len(room.players) == 0:
-            del room_data[room_id]
+        pass
+    finally:
+        await room.submit(partial(leave_room, room_id, room, player))
+
+
+@router.websocket("/replay/{room_id}")
+async def replay_room(room_id: str, ws: WebSocket, interval: float = 0.5):
+    wire = negotiate(ws)
+    await ws.accept(subprotocol=COMPACT_PROTOCOL if wire == "compact" else None)
+    if not is_local(room_id):
+        await ws.send_json({
+            "type": "REJECT",
+            "data": "房間不在此伺服器。"
+        })
+        return
+    token = await ws.receive_text()
+    user = get_user(token)
+
+    events = await game_log.read(room_id)
+    if len(events) == 0 or events[0][0] != SETUP:
+        await ws.send_json({
+            "type": "REJECT",
+            "data": "對戰紀錄不存在。"
+        })
+        return
+    if not is_finished(events):
+        await ws.send_json({
+            "type": "REJECT",
+            "data": "遊戲尚未結束。"
+        })
+        return
+
+    spectator = Player(
+        user=user,
+        ws=ws,
+        observer=True,
+        live=False
+    )
+    spectator._format = wire
+    setup = decode_setup(events[0][1])
+    game = setup_game(setup, [*setup_players(setup), spectator])
+    await game.send_snapshot(spectator)
+    try:
+        for kind, payload in events[1:]:
+            await sleep(max(interval, 0))
+            if spectator._connection is None or spectator._connection.closed:
+                break
+            await apply_event(game, kind, payload)
+        if spectator._connection is not None:
+            await spectator._connection.drain()
+    finally:
+        spectator.close()
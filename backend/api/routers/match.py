@@ -0,0 +1,104 @@
+from fastapi import APIRouter
+from fastapi.websockets import WebSocket, WebSocketDisconnect, WebSocketState
+
+from asyncio import FIRST_COMPLETED, create_task, wait
+from functools import partial
+
+from config import MATCH_MODES
+
+from ..matchmaker import Matchmaker, list_modes
+from ..shard import is_local
+from ..validator import get_user
+from .game import GameSetting, reserve_room
+
+
+router = APIRouter(
+    prefix="/match",
+    tags=["Match"]
+)
+matchmakers: dict[str, Matchmaker] = {}
+
+
+def get_matchmaker(mode: str) -> Matchmaker:
+    matchmaker = matchmakers.get(mode)
+    if matchmaker is None:
+        setting = GameSetting.model_validate(MATCH_MODES[mode].model_dump())
+        matchmaker = Matchmaker(mode, len(setting.start_position), partial(reserve_room, setting))
+        matchmakers[mode] = matchmaker
+    return matchmaker
+
+
+async def wait_disconnect(ws: WebSocket):
+    while True:
+        message = await ws.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+
+@router.get("/modes")
+async def get_modes():
+    return list(map(
+        lambda info: {
+            **info,
+            "waiting": len(matchmakers[info["mode"]]) if info["mode"] in matchmakers else 0
+        },
+        list_modes()
+    ))
+
+
+@router.websocket("/ws/{mode}")
+async def match_queue(mode: str, ws: WebSocket):
+    await ws.accept()
+    if mode not in MATCH_MODES:
+        await ws.send_json({
+            "type": "REJECT",
+            "data": "模式不存在。"
+        })
+        return
+    if not is_local(mode):
+        await ws.send_json({
+            "type": "REJECT",
+            "data": "模式不在此伺服器。"
+        })
+        return
+    token = await ws.receive_text()
+    user = get_user(token)
+
+    matchmaker = get_matchmaker(mode)
+    ticket = matchmaker.join(user)
+    receiver = create_task(wait_disconnect(ws))
+    try:
+        await ws.send_json({
+            "type": "QUEUE",
+            "data": {
+                "mode": mode,
+                "waiting": len(matchmaker)
+            }
+        })
+        await wait([ticket.future, receiver], return_when=FIRST_COMPLETED)
+        if receiver.done():
+            return
+        if ticket.future.cancelled():
+            await ws.send_json({
+                "type": "REJECT",
+                "data": "你已經在其他地方排隊了。"
+            })
+        elif ticket.future.exception() is not None:
+            await ws.send_json({
+                "type": "REJECT",
+                "data": "無法建立房間。"
+            })
+        else:
+            await ws.send_json({
+                "type": "MATCH",
+                "data": ticket.future.result()
+            })
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        matchmaker.leave(ticket)
+    if ws.client_state == WebSocketState.CONNECTED:
+        try:
+            await ws.close()
+        except: pass
@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from metrics import registry
+
+from ..exceptions import NOT_FOUND
+
+router = APIRouter(
+    tags=["Metrics"]
+)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    if not registry.enabled:
+        raise NOT_FOUND
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
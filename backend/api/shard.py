@@ -0,0 +1,19 @@
+from zlib import crc32
+from typing import Optional
+
+from config import SHARD_COUNT, SHARD_HOST, SHARD_PORT
+
+shard_index: Optional[int] = None
+
+def set_shard(index: int):
+    global shard_index
+    shard_index = index
+
+def shard_of(room_id: str) -> int:
+    return crc32(room_id.encode()) % SHARD_COUNT
+
+def shard_address(shard: int) -> str:
+    return f"{SHARD_HOST}:{SHARD_PORT + shard}"
+
+def is_local(room_id: str) -> bool:
+    return shard_index is None or shard_of(room_id) == shard_index
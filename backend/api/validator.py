@@ -1,30 +1,37 @@
-from aiofile import async_open
-from aiohttp import ClientSession
 from fastapi import Depends, Request
 from fastapi.security.utils import get_authorization_scheme_param
 from jwt import encode, decode
-from orjson import loads, dumps, OPT_INDENT_2
+from orjson import loads
 from pydantic import BaseModel
 
+from asyncio import Task, create_task, shield
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
-from os import makedirs
-from os.path import isdir, join
+from hashlib import sha256
+from time import time
 
 from config import (
-    DATA_DIR,
+    DISCORD_API_URL,
     DISCORD_CLIENT_ID,
     DISCORD_CLIENT_SECRET,
     DISCORD_REDIRECT_URI,
     KEY,
+    TOKEN_CACHE_SIZE,
+    TOKEN_CACHE_TTL,
 )
+from metrics import Histogram
 from schemas.discord import DiscordOAuth, DiscordUser
 from schemas.user import User, UserSecret
+from store import get_user_store
 
 from .exceptions import UNAUTHORIZE
+from .http import get_session
 
-USER_DIR = join(DATA_DIR, "users")
-if not isdir(USER_DIR):
-    makedirs(USER_DIR)
+SIGNING_KEY = KEY.encode() if len(KEY.encode()) <= 64 else sha256(KEY.encode()).digest()
+token_cache: OrderedDict[bytes, tuple[float, User]] = OrderedDict()
+refreshing: dict[int, Task] = {}
+user_store = get_user_store()
+oauth_seconds = Histogram("footgame_oauth_request_seconds", "Round-trip time of Discord OAuth requests.", ("endpoint",))
 
 class Token(BaseModel):
     access_token: str
@@ -37,61 +44,54 @@ async def get_header_token(request: Request):
         raise UNAUTHORIZE
     return param
 
-async def discord_auth(code: str) -> DiscordOAuth:
-    async with ClientSession() as session:
-        response = await session.post(
-            "https://discord.com/api/oauth2/token",
-            data={
-                "grant_type": "authorization_code",
-                "code": code,
-                "redirect_uri": DISCORD_REDIRECT_URI,
-                "client_id": DISCORD_CLIENT_ID,
-                "client_secret": DISCORD_CLIENT_SECRET
-            },
-            headers={
-                "Content-Type": "application/x-www-form-urlencoded"
-            }
-        )
+@oauth_seconds.labels("token").timed
+async def request_token(data: dict) -> DiscordOAuth:
+    async with get_session().post(
+        f"{DISCORD_API_URL}/oauth2/token",
+        data={
+            **data,
+            "client_id": DISCORD_CLIENT_ID,
+            "client_secret": DISCORD_CLIENT_SECRET
+        },
+        headers={
+            "Content-Type": "application/x-www-form-urlencoded"
+        }
+    ) as response:
         if response.status != 200:
             raise UNAUTHORIZE
-        content = await response.content.read()
-
-        discord_oauth =  DiscordOAuth.model_validate(loads(content))
-        discord_oauth.expires_in += int(datetime.now().timestamp())
-        return discord_oauth
-
-async def fetch_user(data: DiscordOAuth) -> UserSecret:
-    async with ClientSession() as session:
-        if datetime.now().timestamp() > data.expires_in:
-            response = await session.get(
-                "https://discord.com/api/oauth2/token",
-                data={
-                    "grant_type": "refresh_token",
-                    "refresh_token": data.refresh_token,
-                    "client_id": DISCORD_CLIENT_ID,
-                    "client_secret": DISCORD_CLIENT_SECRET
-                },
-                headers={
-                    "Content-Type": "application/x-www-form-urlencoded"
-                }
-            )
-            if response.status != 200:
-                raise UNAUTHORIZE
-            content = await response.content.read()
-
-            data =  DiscordOAuth.model_validate(loads(content))
-            data.expires_in += int(datetime.now().timestamp())
-        response = await session.get(
-            "https://discord.com/api/users/@me",
-            headers={
-                "Authorization": f"{data.token_type} {data.access_token}"
-            }
-        )
+        content = await response.read()
+
+    discord_oauth =  DiscordOAuth.model_validate(loads(content))
+    discord_oauth.expires_in += int(datetime.now().timestamp())
+    return discord_oauth
+
+@oauth_seconds.labels("user").timed
+async def request_user(data: DiscordOAuth) -> DiscordUser:
+    async with get_session().get(
+        f"{DISCORD_API_URL}/users/@me",
+        headers={
+            "Authorization": f"{data.token_type} {data.access_token}"
+        }
+    ) as response:
         if response.status != 200:
             raise UNAUTHORIZE
-        content = await response.content.read()
+        content = await response.read()
+    return DiscordUser.model_validate(loads(content))
+
+async def discord_auth(code: str) -> DiscordOAuth:
+    return await request_token({
+        "grant_type": "authorization_code",
+        "code": code,
+        "redirect_uri": DISCORD_REDIRECT_URI
+    })
 
-    discord_user = DiscordUser.model_validate(loads(content))
+async def fetch_user(data: DiscordOAuth) -> UserSecret:
+    if datetime.now().timestamp() > data.expires_in:
+        data = await request_token({
+            "grant_type": "refresh_token",
+            "refresh_token": data.refresh_token
+        })
+    discord_user = await request_user(data)
     user_secret = UserSecret(
         id=discord_user.id,
         username=discord_user.username,
@@ -100,16 +100,14 @@ async def fetch_user(data: DiscordOAuth) -> UserSecret:
         discord_oauth=data
     )
 
-    async with async_open(f"{join(USER_DIR, str(user_secret.id))}.json", "wb") as user_file:
-        await user_file.write(dumps(user_secret.model_dump(), option=OPT_INDENT_2))
-    
+    await user_store.set(user_secret)
     return user_secret
 
 def gen_jwt(user: User) -> Token:
     data = user.model_dump()
     data["exp"] = datetime.now(timezone.utc) + timedelta(days=3)
     return Token(
-        access_token=encode(data, key=KEY, algorithm="HS256")
+        access_token=encode(data, key=SIGNING_KEY, algorithm="HS256")
     )
 
 async def user_login(code: str) -> str:
@@ -117,23 +115,46 @@ async def user_login(code: str) -> str:
     user_secret = await fetch_user(data=discord_oauth)
     return gen_jwt(user=User.model_validate(user_secret.model_dump(exclude=["discord_oauth"])))
 
+def verify_token(token: str) -> User:
+    digest = sha256(token.encode()).digest()
+    now = time()
+    item = token_cache.get(digest)
+    if item is not None:
+        if item[0] > now:
+            token_cache.move_to_end(digest)
+            return item[1]
+        del token_cache[digest]
+
+    data = decode(token, key=SIGNING_KEY, algorithms=["HS256"])
+    user = User.model_validate(data)
+    token_cache[digest] = (min(data.get("exp", now), now + TOKEN_CACHE_TTL), user)
+    if len(token_cache) > TOKEN_CACHE_SIZE:
+        token_cache.popitem(last=False)
+    return user
+
 def get_user(token: str = Depends(get_header_token)) -> User:
     try:
-        return User.model_validate(
-            decode(token, key=KEY, algorithms=["HS256"])
-        )
+        return verify_token(token)
     except:
         raise UNAUTHORIZE
 
+async def refresh_secret(user_id: int) -> Token:
+    user_secret = await user_store.get(user_id)
+    if user_secret is None:
+        raise UNAUTHORIZE
+    user = await fetch_user(data=user_secret.discord_oauth)
+    return gen_jwt(user=User.model_validate(user.model_dump(exclude=["discord_oauth"])))
+
 async def refresh_user(token: str = Depends(get_header_token)) -> Token:
     try:
         user = User.model_validate(
-            decode(token, key=KEY, algorithms=["HS256"], options={"verify_exp": False})
+            decode(token, key=SIGNING_KEY, algorithms=["HS256"], options={"verify_exp": False})
         )
-        async with async_open(f"{join(USER_DIR, str(user.id))}.json", "rb") as user_file:
-            user_secret = UserSecret.model_validate(loads(await user_file.read()))
-        user = await fetch_user(data=user_secret.discord_oauth)
-        return gen_jwt(user=User.model_validate(user.model_dump(exclude=["discord_oauth"])))
+        task = refreshing.get(user.id)
+        if task is None:
+            task = create_task(refresh_secret(user.id))
+            refreshing[user.id] = task
+            task.add_done_callback(lambda _: refreshing.pop(user.id, None))
+        return await shield(task)
     except:
         raise UNAUTHORIZE
-
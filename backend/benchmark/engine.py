@@ -0,0 +1,235 @@
+from fastapi.websockets import WebSocket
+from orjson import dumps, loads, OPT_INDENT_2
+
+from argparse import ArgumentParser
+from asyncio import run, sleep
+from itertools import chain
+from os.path import dirname, isfile, join
+from platform import python_version
+from random import seed
+from statistics import median
+from sys import exit
+from time import perf_counter
+from typing import Awaitable, Callable, Optional
+
+from foot_game import FootGame, Player, Spectators
+from schemas.user import User
+
+BASELINE = join(dirname(__file__), "baseline.json")
+BOARDS = [(8, 8), (32, 32), (64, 64)]
+PLAYERS = [2, 8]
+OBSERVERS = [0, 16, 1024]
+
+class NullWebSocket(WebSocket):
+    def __init__(self) -> None:
+        pass
+
+    async def send_text(self, data: str):
+        pass
+
+class Case():
+    width: int
+    height: int
+    players: int
+    observers: int
+
+    def __init__(self, width: int, height: int, players: int, observers: int) -> None:
+        self.width = width
+        self.height = height
+        self.players = players
+        self.observers = observers
+
+    @property
+    def name(self) -> str:
+        return f"{self.width}x{self.height}/p{self.players}/o{self.observers}"
+
+    def make_players(self, count: int) -> list[Player]:
+        return list(map(
+            lambda i: Player(
+                user=User(
+                    id=i + 1,
+                    username=f"bench{i + 1}",
+                    display_name=f"Bench {i + 1}",
+                    avatar_url="https://cdn.discordapp.com/embed/avatars/0.png"
+                ),
+                ws=NullWebSocket()
+            ),
+            range(count)
+        ))
+
+    def make_game(self, players: Optional[list[Player]] = None) -> FootGame:
+        seed(0)
+        step = self.width // self.players
+        return FootGame(
+            width=self.width,
+            height=self.height,
+            bomb_count=3,
+            start_position=list(map(lambda i: (i * step, 0), range(self.players))),
+            players=players or self.make_players(self.players)
+        )
+
+    def watch(self, game: FootGame) -> FootGame:
+        spectators = Spectators(interval=0)
+        game.watch(spectators)
+        for player in self.make_players(self.players + self.observers)[self.players:]:
+            spectators.add(player)
+        return game
+
+async def drain(game: FootGame):
+    spectators = game.spectators
+    while spectators.handle is not None or spectators.task is not None or any(map(
+        lambda player: player._connection is not None and len(player._connection.queue) > 0,
+        chain(game.players, spectators)
+    )):
+        await sleep(0)
+
+async def walk(game: FootGame) -> bool:
+    player = game.now_player
+    if game.end or not game.map.contains(player.pos_x, player.pos_y + 1):
+        return False
+    await game.move(player, player.pos_x, player.pos_y + 1, False)
+    return True
+
+async def teardown(game: FootGame):
+    game.stop()
+    await drain(game)
+    for player in chain(game.players, game.spectators):
+        player.close()
+
+async def measure(
+    case: Case,
+    setup: Callable[[], Awaitable[FootGame]],
+    op: Callable[[FootGame], Awaitable[bool]],
+    min_time: float
+) -> list[float]:
+    samples: list[float] = []
+    total = 0
+    game = await setup()
+    while total < min_time or len(samples) < 5:
+        start = perf_counter()
+        ok = await op(game)
+        elapsed = perf_counter() - start
+        if not ok:
+            await teardown(game)
+            game = await setup()
+            continue
+        samples.append(elapsed)
+        total += elapsed
+        await drain(game)
+    await teardown(game)
+    return samples
+
+def benchmarks(case: Case) -> dict[str, tuple[Callable[[], Awaitable[FootGame]], Callable[[FootGame], Awaitable[bool]]]]:
+    observer = Player(
+        user=User(id=0, username="observer", display_name="Observer", avatar_url=""),
+        observer=True,
+        live=False
+    )
+
+    async def fresh() -> FootGame:
+        return case.watch(case.make_game())
+
+    async def started() -> FootGame:
+        game = case.watch(case.make_game())
+        await game.next_round(False)
+        for _ in range(case.players * (case.height // 2)):
+            await walk(game)
+        await drain(game)
+        return game
+
+    async def init(game: FootGame) -> bool:
+        case.make_game(game.players).stop()
+        return True
+
+    async def generate_map(game: FootGame) -> bool:
+        game.map_cache.clear()
+        game.player_cache.clear()
+        game.generate_map(game.now_player)
+        return True
+
+    async def generate_map_all(game: FootGame) -> bool:
+        game.map_cache.clear()
+        game.player_cache.clear()
+        game.generate_map(observer)
+        return True
+
+    async def check_around(game: FootGame) -> bool:
+        game.check_around(game.now_player)
+        return True
+
+    async def next_round(game: FootGame) -> bool:
+        await game.next_round()
+        return not game.end
+
+    async def send_update(game: FootGame) -> bool:
+        await game.send_update()
+        return True
+
+    return {
+        "init": (fresh, init),
+        "move": (fresh, walk),
+        "generate_map": (started, generate_map),
+        "generate_map_all": (started, generate_map_all),
+        "check_around": (started, check_around),
+        "next_round": (started, next_round),
+        "send_update": (started, send_update),
+    }
+
+async def run_suite(min_time: float, only: Optional[str]) -> dict[str, dict]:
+    results: dict[str, dict] = {}
+    for width, height in BOARDS:
+        for players in PLAYERS:
+            for observers in OBSERVERS:
+                case = Case(width, height, players, observers)
+                for name, (setup, op) in benchmarks(case).items():
+                    key = f"{name}[{case.name}]"
+                    if only is not None and only not in key:
+                        continue
+                    samples = await measure(case, setup, op, min_time)
+                    results[key] = {
+                        "median": median(samples),
+                        "min": min(samples),
+                        "rounds": len(samples)
+                    }
+                    print(f"{key:<40}{results[key]['median'] * 1e6:>12.1f}us{results[key]['min'] * 1e6:>12.1f}us")
+    return results
+
+def compare(results: dict[str, dict], path: str, threshold: float) -> bool:
+    with open(path, "rb") as baseline_file:
+        baseline = loads(baseline_file.read())["results"]
+    regressed = False
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        ratio = result["median"] / base["median"]
+        mark = ""
+        if ratio > 1 + threshold:
+            mark = "REGRESSED"
+            regressed = True
+        print(f"{key:<40}{ratio:>10.2f}x {mark}")
+    return not regressed
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--filter", default=None)
+    parser.add_argument("--save", nargs="?", const=BASELINE, default=None)
+    parser.add_argument("--compare", nargs="?", const=BASELINE, default=None)
+    parser.add_argument("--threshold", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = run(run_suite(args.min_time, args.filter))
+    if args.save is not None:
+        with open(args.save, "wb") as baseline_file:
+            baseline_file.write(dumps({
+                "python": python_version(),
+                "min_time": args.min_time,
+                "results": results
+            }, option=OPT_INDENT_2))
+    if args.compare is not None and isfile(args.compare):
+        if not compare(results, args.compare, args.threshold):
+            exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+from jwt import decode
+
+from sys import argv
+from time import perf_counter
+
+from api.validator import SIGNING_KEY, gen_jwt, get_user, token_cache
+from config import KEY
+from schemas.user import User
+
+def measure(name: str, count: int, func):
+    start = perf_counter()
+    func()
+    elapsed = perf_counter() - start
+    print(f"{name:<16}{count / elapsed:>12.0f} handshakes/s")
+
+def main(count: int = 5000):
+    tokens = list(map(
+        lambda i: gen_jwt(User(
+            id=i,
+            username=f"user{i}",
+            display_name=f"User {i}",
+            avatar_url="https://cdn.discordapp.com/embed/avatars/0.png"
+        )).access_token,
+        range(count)
+    ))
+
+    measure("raw key", count, lambda: list(map(
+        lambda token: User.model_validate(decode(token, key=KEY, algorithms=["HS256"])),
+        tokens
+    )))
+    measure("derived key", count, lambda: list(map(
+        lambda token: User.model_validate(decode(token, key=SIGNING_KEY, algorithms=["HS256"])),
+        tokens
+    )))
+    token_cache.clear()
+    measure("cache miss", count, lambda: list(map(get_user, tokens)))
+    measure("cache hit", count, lambda: list(map(get_user, tokens)))
+
+if __name__ == "__main__":
+    main(int(argv[1]) if len(argv) > 1 else 5000)
@@ -0,0 +1,237 @@
+from aiohttp import ClientSession, TCPConnector, WSMsgType
+from orjson import dumps, loads
+
+from argparse import ArgumentParser
+from asyncio import Event, gather, get_event_loop, run, sleep, wait_for
+from multiprocessing import Process
+from os.path import isfile
+from random import choice
+from time import perf_counter
+from typing import Optional
+
+from api import run as run_api
+from api.validator import gen_jwt
+from foot_game.compact import COMPACT_PROTOCOL, unpack_frame
+from schemas.user import User
+
+class Stats():
+    frames: int = 0
+    bytes: int = 0
+    moves: int = 0
+    latency: list[float] = []
+    rss: list[int] = []
+
+    def __init__(self) -> None:
+        self.frames = 0
+        self.bytes = 0
+        self.moves = 0
+        self.latency = []
+        self.rss = []
+
+class Room():
+    room_id: str
+    width: int
+    height: int
+    players: int
+    turns: int
+    moves: int = 0
+    last_seq: Optional[int] = None
+    sent: dict[int, float] = {}
+    started: Event
+
+    def __init__(self, room_id: str, width: int, height: int, players: int, turns: int) -> None:
+        self.room_id = room_id
+        self.width = width
+        self.height = height
+        self.players = players
+        self.turns = turns
+        self.moves = 0
+        self.last_seq = None
+        self.sent = {}
+        self.started = Event()
+
+def percentile(values: list[float], ratio: float) -> float:
+    if len(values) == 0:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * ratio))]
+
+def read_rss(pid: int) -> Optional[int]:
+    path = f"/proc/{pid}/status"
+    if not isfile(path):
+        return None
+    with open(path) as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return None
+
+def setting(players: int) -> dict:
+    width = max(8, players * 2)
+    height = 16
+    return {
+        "width": width,
+        "height": height,
+        "bomb_count": 3,
+        "start_position": list(map(
+            lambda i: [i * 2, 0 if i % 2 == 0 else height - 1],
+            range(players)
+        ))
+    }
+
+def pick_move(room: Room, player: dict, visited: set[tuple[int, int]]) -> dict:
+    x, y = player["pos_x"], player["pos_y"]
+    targets = list(filter(
+        lambda pos: 0 <= pos[0] < room.width and 0 <= pos[1] < room.height,
+        [(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)]
+    ))
+    target = choice(list(filter(lambda pos: pos not in visited, targets)) or targets)
+    visited.add(target)
+    return {
+        "type": "MOVE",
+        "data": {
+            "x": target[0],
+            "y": target[1],
+            "bomb": False
+        }
+    }
+
+def read_frame(message) -> dict:
+    if message.type == WSMsgType.BINARY:
+        frame_type, header, _ = unpack_frame(message.data)
+        return {"type": frame_type, "data": header}
+    return loads(message.data)
+
+async def play(session: ClientSession, base: str, room: Room, user: User, host: bool, stats: Stats, compact: bool):
+    ws = await session.ws_connect(
+        f"{base}/game/ws/{room.room_id}",
+        protocols=[COMPACT_PROTOCOL] if compact else ()
+    )
+    await ws.send_str(gen_jwt(user).access_token)
+    visited: set[tuple[int, int]] = set()
+    try:
+        async for message in ws:
+            if message.type not in (WSMsgType.TEXT, WSMsgType.BINARY):
+                break
+            stats.frames += 1
+            stats.bytes += len(message.data)
+            frame = read_frame(message)
+            if frame["type"] == "USER":
+                if host and not room.started.is_set() and len(frame["data"]["users"]) == room.players:
+                    room.started.set()
+                    await ws.send_str(dumps({"type": "START"}).decode())
+            elif frame["type"] in ("DATA", "PATCH"):
+                data = frame["data"]
+                seq = data["seq"]
+                sent = room.sent.get(seq)
+                if sent is not None:
+                    stats.latency.append(perf_counter() - sent)
+                if room.last_seq is not None and seq >= room.last_seq:
+                    break
+                player = data["player"]
+                visited.add((player["pos_x"], player["pos_y"]))
+                if data["current_player"] == user.id and player["live"] and room.sent.get(seq + 1) is None:
+                    room.sent[seq + 1] = perf_counter()
+                    room.moves += 1
+                    stats.moves += 1
+                    if room.moves >= room.turns:
+                        room.last_seq = seq + 1
+                    await ws.send_str(dumps(pick_move(room, player, visited)).decode())
+            elif frame["type"] == "END":
+                break
+    finally:
+        await ws.close()
+
+async def sample_rss(pid: Optional[int], stats: Stats, done: Event):
+    while pid is not None and not done.is_set():
+        rss = read_rss(pid)
+        if rss is not None:
+            stats.rss.append(rss)
+        await sleep(0.1)
+
+async def drive(base: str, rooms: int, players: int, turns: int, compact: bool, pid: Optional[int]):
+    stats = Stats()
+    done = Event()
+    baseline = read_rss(pid) if pid is not None else None
+    sampler = get_event_loop().create_task(sample_rss(pid, stats, done))
+    async with ClientSession(connector=TCPConnector(limit=0)) as session:
+        room_list: list[Room] = []
+        for _ in range(rooms):
+            data = setting(players)
+            async with session.post(f"{base}/game", json=data) as response:
+                room_id = loads(await response.read())
+            room_list.append(Room(room_id, data["width"], data["height"], players, turns))
+
+        start = perf_counter()
+        await gather(*map(
+            lambda index: play(
+                session,
+                base,
+                room_list[index // players],
+                User(
+                    id=index + 1,
+                    username=f"load{index + 1}",
+                    display_name=f"Load {index + 1}",
+                    avatar_url="https://cdn.discordapp.com/embed/avatars/0.png"
+                ),
+                index % players == 0,
+                stats,
+                compact
+            ),
+            range(rooms * players)
+        ), return_exceptions=True)
+        elapsed = perf_counter() - start
+    done.set()
+    await sampler
+
+    print(f"{'rooms':<16}{rooms:>12}")
+    print(f"{'clients':<16}{rooms * players:>12}")
+    print(f"{'moves':<16}{stats.moves:>12}")
+    print(f"{'elapsed':<16}{elapsed:>11.2f}s")
+    print(f"{'messages/s':<16}{stats.frames / elapsed:>12.0f}")
+    print(f"{'moves/s':<16}{stats.moves / elapsed:>12.0f}")
+    print(f"{'bytes/message':<16}{stats.bytes / max(stats.frames, 1):>12.0f}")
+    print(f"{'p50 latency':<16}{percentile(stats.latency, 0.5) * 1000:>10.2f}ms")
+    print(f"{'p99 latency':<16}{percentile(stats.latency, 0.99) * 1000:>10.2f}ms")
+    if baseline is not None and len(stats.rss) > 0:
+        print(f"{'memory/room':<16}{(max(stats.rss) - baseline) / rooms / 1024:>10.1f}KB")
+
+def serve(port: int):
+    run(run_api(get_event_loop(), host="127.0.0.1", port=port, log_level="warning"))
+
+async def wait_ready(base: str):
+    async with ClientSession() as session:
+        while True:
+            try:
+                async with session.get(f"{base}/game/queues") as response:
+                    if response.status == 200:
+                        return
+            except OSError:
+                pass
+            await sleep(0.1)
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--rooms", type=int, default=100)
+    parser.add_argument("--players", type=int, default=2)
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8200)
+    parser.add_argument("--external", action="store_true")
+    parser.add_argument("--compact", action="store_true")
+    args = parser.parse_args()
+
+    base = f"http://{args.host}:{args.port}"
+    server = None
+    if not args.external:
+        server = Process(target=serve, args=(args.port,), daemon=True)
+        server.start()
+    try:
+        run(wait_for(wait_ready(base), 30))
+        run(drive(base, args.rooms, args.players, args.turns, args.compact, None if server is None else server.pid))
+    finally:
+        if server is not None:
+            server.terminate()
+
+if __name__ == "__main__":
+    main()
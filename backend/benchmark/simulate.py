@@ -0,0 +1,112 @@
+from orjson import dumps, OPT_INDENT_2
+
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from os import cpu_count
+from time import perf_counter
+
+from foot_game import Simulation, random_policy
+
+def parse_position(value: str) -> tuple[int, int]:
+    x, y = value.split(",")
+    return int(x), int(y)
+
+def run_chunk(setting: dict, seeds: range, max_turns: int, bomb_rate: float) -> dict:
+    players = len(setting["start_position"])
+    stats = {
+        "games": 0,
+        "wins": [0] * players,
+        "draws": 0,
+        "turns": 0,
+        "stomps": 0,
+        "bombs": 0
+    }
+    policy = random_policy(bomb_rate)
+    for seed in seeds:
+        sim = Simulation(**setting, seed=seed).run(policy, max_turns)
+        stats["games"] += 1
+        stats["turns"] += sim.turns
+        stats["stomps"] += sim.stomps
+        stats["bombs"] += sim.bombs
+        if sim.winner is None:
+            stats["draws"] += 1
+        else:
+            stats["wins"][sim.winner._seat] += 1
+    return stats
+
+def merge(results: list[dict]) -> dict:
+    total = results[0]
+    for result in results[1:]:
+        for key, value in result.items():
+            if key == "wins":
+                total["wins"] = list(map(sum, zip(total["wins"], value)))
+            else:
+                total[key] += value
+    return total
+
+def summarize(stats: dict, elapsed: float) -> dict:
+    games = max(stats["games"], 1)
+    deaths = stats["stomps"] + stats["bombs"]
+    return {
+        "games": stats["games"],
+        "games_per_second": stats["games"] / elapsed,
+        "win_rate": list(map(lambda wins: wins / games, stats["wins"])),
+        "draw_rate": stats["draws"] / games,
+        "average_turns": stats["turns"] / games,
+        "bomb_death_rate": stats["bombs"] / deaths if deaths > 0 else 0,
+        "bomb_deaths_per_game": stats["bombs"] / games
+    }
+
+def simulate(setting: dict, games: int, workers: int, chunk: int, seed: int, max_turns: int, bomb_rate: float) -> dict:
+    chunks = list(map(
+        lambda start: range(seed + start, seed + min(start + chunk, games)),
+        range(0, games, chunk)
+    ))
+    start = perf_counter()
+    with ProcessPoolExecutor(workers) as executor:
+        results = list(executor.map(
+            run_chunk,
+            [setting] * len(chunks),
+            chunks,
+            [max_turns] * len(chunks),
+            [bomb_rate] * len(chunks)
+        ))
+    return summarize(merge(results), perf_counter() - start)
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=cpu_count())
+    parser.add_argument("--chunk", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--width", type=int, default=8)
+    parser.add_argument("--height", type=int, default=8)
+    parser.add_argument("--bomb-count", type=int, default=3)
+    parser.add_argument("--start", type=parse_position, action="append", default=None)
+    parser.add_argument("--max-turns", type=int, default=10000)
+    parser.add_argument("--bomb-rate", type=float, default=0.2)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    setting = {
+        "width": args.width,
+        "height": args.height,
+        "bomb_count": args.bomb_count,
+        "start_position": args.start or [(0, 0), (args.width - 1, args.height - 1)]
+    }
+    result = simulate(setting, args.games, args.workers, args.chunk, args.seed, args.max_turns, args.bomb_rate)
+    if args.json:
+        print(dumps({"setting": setting, **result}, option=OPT_INDENT_2).decode())
+        return
+
+    print(f"{'games':<24}{result['games']:>12}")
+    print(f"{'games/s':<24}{result['games_per_second']:>12.0f}")
+    for seat, rate in enumerate(result["win_rate"]):
+        print(f"{f'win rate seat {seat}':<24}{rate * 100:>11.1f}%")
+    print(f"{'draw rate':<24}{result['draw_rate'] * 100:>11.1f}%")
+    print(f"{'average turns':<24}{result['average_turns']:>12.1f}")
+    print(f"{'bomb death rate':<24}{result['bomb_death_rate'] * 100:>11.1f}%")
+    print(f"{'bomb deaths/game':<24}{result['bomb_deaths_per_game']:>12.2f}")
+
+if __name__ == "__main__":
+    main()
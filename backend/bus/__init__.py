@@ -0,0 +1,3 @@
+from .bus import BroadcastBus, InProcessBus, PubSubBus, get_bus
+
+broadcast_bus = get_bus()
\ No newline at end of file
@@ -0,0 +1,149 @@
+from orjson import dumps, loads
+
+from asyncio import Lock, StreamReader, StreamWriter, Task, create_task, get_running_loop, open_connection, sleep
+from typing import Awaitable, Callable, Optional
+
+from config import BUS, BUS_HOST, BUS_PORT, BUS_TICK
+from store.resp import RespClient, encode_command, read_reply
+
+Handler = Callable[[list], Awaitable[None]]
+
+RECONNECT_DELAY = 0.5
+MAX_RECONNECT_DELAY = 30
+
+class BroadcastBus():
+    tick: float
+    handlers: dict[str, list[Handler]]
+    pending: dict[str, list]
+    tasks: set[Task]
+    scheduled: bool = False
+
+    def __init__(self, tick: float = BUS_TICK) -> None:
+        self.tick = tick
+        self.handlers = {}
+        self.pending = {}
+        self.tasks = set()
+        self.scheduled = False
+
+    async def subscribe(self, channel: str, handler: Handler):
+        self.handlers.setdefault(channel, []).append(handler)
+
+    async def unsubscribe(self, channel: str, handler: Handler):
+        handlers = self.handlers.get(channel, [])
+        if handler in handlers:
+            handlers.remove(handler)
+        if len(handlers) == 0:
+            self.handlers.pop(channel, None)
+
+    async def is_subscribed(self, channel: str) -> bool:
+        return channel in self.handlers
+
+    def publish(self, channel: str, message):
+        self.pending.setdefault(channel, []).append(message)
+        if not self.scheduled:
+            self.scheduled = True
+            get_running_loop().call_later(self.tick, self.schedule_flush)
+
+    def schedule_flush(self):
+        self.scheduled = False
+        pending, self.pending = self.pending, {}
+        task = create_task(self.flush(pending))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def flush(self, pending: dict[str, list]):
+        for channel, messages in pending.items():
+            await self.deliver(channel, messages)
+
+    async def deliver(self, channel: str, messages: list):
+        await self.dispatch(channel, messages)
+
+    async def dispatch(self, channel: str, messages: list):
+        for handler in list(self.handlers.get(channel, [])):
+            try:
+                await handler(messages)
+            except: pass
+
+class InProcessBus(BroadcastBus):
+    pass
+
+class PubSubBus(BroadcastBus):
+    client: RespClient
+    host: str
+    port: int
+    reader: Optional[StreamReader] = None
+    writer: Optional[StreamWriter] = None
+    listener: Optional[Task] = None
+    lock: Lock
+
+    def __init__(self, host: str = BUS_HOST, port: int = BUS_PORT, tick: float = BUS_TICK) -> None:
+        super().__init__(tick)
+        self.host = host
+        self.port = port
+        self.client = RespClient(host, port)
+        self.reader = None
+        self.writer = None
+        self.listener = None
+        self.lock = Lock()
+
+    async def connect(self):
+        async with self.lock:
+            if self.writer is not None:
+                return
+            self.reader, self.writer = await open_connection(self.host, self.port)
+            self.listener = create_task(self.listen())
+            if len(self.handlers) > 0:
+                self.writer.write(encode_command("SUBSCRIBE", *self.handlers.keys()))
+                await self.writer.drain()
+
+    async def reconnect(self):
+        delay = RECONNECT_DELAY
+        while self.writer is None and len(self.handlers) > 0:
+            await sleep(delay)
+            try:
+                await self.connect()
+            except:
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    async def listen(self):
+        try:
+            while True:
+                reply = await read_reply(self.reader)
+                if reply[0] == b"message":
+                    await self.dispatch(reply[1].decode(), loads(reply[2]))
+        except: pass
+        self.writer.close()
+        self.reader = None
+        self.writer = None
+        task = create_task(self.reconnect())
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def subscribe(self, channel: str, handler: Handler):
+        subscribed = channel in self.handlers
+        await super().subscribe(channel, handler)
+        if self.writer is None:
+            await self.connect()
+        elif not subscribed:
+            self.writer.write(encode_command("SUBSCRIBE", channel))
+            await self.writer.drain()
+
+    async def unsubscribe(self, channel: str, handler: Handler):
+        await super().unsubscribe(channel, handler)
+        if channel not in self.handlers and self.writer is not None:
+            self.writer.write(encode_command("UNSUBSCRIBE", channel))
+            await self.writer.drain()
+
+    async def is_subscribed(self, channel: str) -> bool:
+        reply = await self.client.execute("PUBSUB", "NUMSUB", channel)
+        return reply[1] > 0
+
+    async def deliver(self, channel: str, messages: list):
+        try:
+            await self.client.execute("PUBLISH", channel, dumps(messages))
+        except: pass
+
+def get_bus() -> BroadcastBus:
+    if BUS == "pubsub":
+        return PubSubBus()
+    return InProcessBus()
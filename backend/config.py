@@ -3,6 +3,14 @@ from pydantic import BaseModel
 
 from os import makedirs, urandom
 from os.path import isfile, isdir
+from typing import Literal
+
+
+class MatchMode(BaseModel):
+    width: int
+    height: int
+    bomb_count: int
+    start_position: list[tuple[int, int]]
 
 
 class Config(BaseModel):
@@ -14,6 +22,57 @@ class Config(BaseModel):
     discord_redirect_uri: str = ""
     discord_client_id: str = ""
     discord_client_secret: str = ""
+    discord_api_url: str = "https://discord.com/api"
+    send_timeout: float = 5
+    outbound_queue_size: int = 64
+    outbound_policy: Literal["coalesce", "drop", "disconnect"] = "coalesce"
+    around_neighborhood: Literal["von_neumann", "moore"] = "von_neumann"
+    around_radius: int = 1
+    shard_count: int = 0
+    shard_host: str = "127.0.0.1"
+    shard_port: int = 8100
+    room_store: Literal["memory", "redis"] = "memory"
+    room_store_host: str = "127.0.0.1"
+    room_store_port: int = 6379
+    room_ttl: int = 3600
+    node_id: str = ""
+    bus: Literal["local", "pubsub"] = "local"
+    bus_host: str = "127.0.0.1"
+    bus_port: int = 6379
+    bus_tick: float = 0.01
+    token_cache_size: int = 4096
+    token_cache_ttl: int = 300
+    http_timeout: float = 10
+    http_connection_limit: int = 16
+    http_keepalive: float = 30
+    user_store: Literal["file", "log"] = "file"
+    user_cache_size: int = 4096
+    user_flush_interval: float = 1
+    user_fsync: bool = False
+    turn_timeout: float = 60
+    turn_forfeit_after: int = 3
+    timer_tick: float = 0.1
+    timer_slots: int = 512
+    max_frame_size: int = 4096
+    inbound_rate: float = 20
+    inbound_burst: int = 40
+    metrics: bool = False
+    admin_token: str = ""
+    trace_threshold: float = 0.05
+    trace_limit: int = 32
+    game_log_interval: float = 0.05
+    game_log_fsync: bool = False
+    game_log_retention: float = 604800
+    bot_think_time: float = 0.5
+    bot_workers: int = 1
+    spectator_interval: float = 0.25
+    spectator_chunk: int = 256
+    match_modes: dict[str, MatchMode] = {
+        "duel": MatchMode(width=3, height=12, bomb_count=3, start_position=[(1, 0), (1, 11)]),
+        "quad": MatchMode(width=8, height=8, bomb_count=3, start_position=[(0, 0), (7, 7), (0, 7), (7, 0)]),
+    }
+    match_interval: float = 0.2
+    match_timeout: float = 30
 
 if not isfile("config.json"):
     with open("config.json", "wb") as config_file:
@@ -33,6 +92,54 @@ API_ROOT_PATH = config.api_root_path
 DISCORD_REDIRECT_URI = config.discord_redirect_uri
 DISCORD_CLIENT_ID = config.discord_client_id
 DISCORD_CLIENT_SECRET = config.discord_client_secret
+DISCORD_API_URL = config.discord_api_url
+SEND_TIMEOUT = config.send_timeout
+OUTBOUND_QUEUE_SIZE = config.outbound_queue_size
+OUTBOUND_POLICY = config.outbound_policy
+AROUND_NEIGHBORHOOD = config.around_neighborhood
+AROUND_RADIUS = config.around_radius
+SHARD_COUNT = config.shard_count
+SHARD_HOST = config.shard_host
+SHARD_PORT = config.shard_port
+ROOM_STORE = config.room_store
+ROOM_STORE_HOST = config.room_store_host
+ROOM_STORE_PORT = config.room_store_port
+ROOM_TTL = config.room_ttl
+NODE_ID = config.node_id or urandom(8).hex()
+BUS = config.bus
+BUS_HOST = config.bus_host
+BUS_PORT = config.bus_port
+BUS_TICK = config.bus_tick
+TOKEN_CACHE_SIZE = config.token_cache_size
+TOKEN_CACHE_TTL = config.token_cache_ttl
+HTTP_TIMEOUT = config.http_timeout
+HTTP_CONNECTION_LIMIT = config.http_connection_limit
+HTTP_KEEPALIVE = config.http_keepalive
+USER_STORE = config.user_store
+USER_CACHE_SIZE = config.user_cache_size
+USER_FLUSH_INTERVAL = config.user_flush_interval
+USER_FSYNC = config.user_fsync
+TURN_TIMEOUT = config.turn_timeout
+TURN_FORFEIT_AFTER = config.turn_forfeit_after
+TIMER_TICK = config.timer_tick
+TIMER_SLOTS = config.timer_slots
+MAX_FRAME_SIZE = config.max_frame_size
+INBOUND_RATE = config.inbound_rate
+INBOUND_BURST = config.inbound_burst
+METRICS = config.metrics
+ADMIN_TOKEN = config.admin_token
+TRACE_THRESHOLD = config.trace_threshold
+TRACE_LIMIT = config.trace_limit
+GAME_LOG_INTERVAL = config.game_log_interval
+GAME_LOG_FSYNC = config.game_log_fsync
+GAME_LOG_RETENTION = config.game_log_retention
+BOT_THINK_TIME = config.bot_think_time
+BOT_WORKERS = config.bot_workers
+SPECTATOR_INTERVAL = config.spectator_interval
+SPECTATOR_CHUNK = config.spectator_chunk
+MATCH_MODES = config.match_modes
+MATCH_INTERVAL = config.match_interval
+MATCH_TIMEOUT = config.match_timeout
 
 if not isdir(DATA_DIR):
     makedirs(DATA_DIR)
@@ -1,2 +1,12 @@
 from . import direction
-from .foot_game import FootGame, Player
\ No newline at end of file
+from .bot import make_bot, shutdown_bots, think
+from .broadcast import broadcast
+from .compact import COMPACT_PROTOCOL, WireFormat, negotiate
+from .connection import Connection, encode, queue_stats
+from .events import SETUP, decode_setup, encode_setup
+from .foot_game import FootGame
+from .player import Player
+from .replay import apply_event, is_finished, replay, setup_game, setup_players
+from .simulation import Simulation, random_policy
+from .spectators import Spectators
+from .trace import Tracer, span
\ No newline at end of file
@@ -0,0 +1,90 @@
+from array import array
+from base64 import b64decode, b64encode
+from typing import Optional
+
+from .player import Player
+
+NO_OWNER = -1
+MAX_SEATS = 64
+
+class Board():
+    width: int
+    height: int
+    seats: list[Player]
+    owners: array
+    first: array
+    last: array
+    bombs: array
+
+    def __init__(self, width: int, height: int, seats: list[Player]) -> None:
+        if len(seats) > MAX_SEATS:
+            raise ValueError(f"Board supports at most {MAX_SEATS} seats.")
+        size = width * height
+        self.width = width
+        self.height = height
+        self.seats = list(seats)
+        self.owners = array("Q", bytes(8 * size))
+        self.first = array("b", [NO_OWNER]) * size
+        self.last = array("b", [NO_OWNER]) * size
+        self.bombs = array("B", bytes(size))
+
+    def index(self, x: int, y: int) -> int:
+        return x * self.height + y
+
+    def contains(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def is_empty(self, index: int) -> bool:
+        return self.owners[index] == 0
+
+    def has_bomb(self, index: int) -> bool:
+        return self.bombs[index] == 1
+
+    def has_owner(self, index: int, seat: int) -> bool:
+        return (self.owners[index] >> seat) & 1 == 1
+
+    def first_owner(self, index: int) -> Optional[Player]:
+        seat = self.first[index]
+        return None if seat == NO_OWNER else self.seats[seat]
+
+    def last_owner(self, index: int) -> Optional[Player]:
+        seat = self.last[index]
+        return None if seat == NO_OWNER else self.seats[seat]
+
+    def state(self, index: int) -> tuple[int, int]:
+        return self.owners[index], self.bombs[index]
+
+    def add(self, index: int, seat: int, bomb: bool):
+        self.owners[index] |= 1 << seat
+        if self.first[index] == NO_OWNER:
+            self.first[index] = seat
+        self.last[index] = seat
+        self.bombs[index] = bomb
+
+    def reset(self, index: int, seat: int, bomb: bool):
+        self.owners[index] = 1 << seat
+        self.first[index] = seat
+        self.last[index] = seat
+        self.bombs[index] = bomb
+
+    def set_bomb(self, index: int, bomb: bool):
+        self.bombs[index] = bomb
+
+    def dump(self) -> dict:
+        return {
+            "width": self.width,
+            "height": self.height,
+            "owners": b64encode(self.owners.tobytes()).decode(),
+            "first": b64encode(self.first.tobytes()).decode(),
+            "last": b64encode(self.last.tobytes()).decode(),
+            "bombs": b64encode(self.bombs.tobytes()).decode(),
+        }
+
+    @classmethod
+    def load(cls, data: dict, seats: list[Player]) -> "Board":
+        board = cls(data["width"], data["height"], seats)
+        board.owners = array("Q", b64decode(data["owners"]))
+        board.first = array("b", b64decode(data["first"]))
+        board.last = array("b", b64decode(data["last"]))
+        board.bombs = array("B", b64decode(data["bombs"]))
+        return board
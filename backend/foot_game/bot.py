@@ -0,0 +1,66 @@
+from asyncio import get_running_loop
+from concurrent.futures import Executor, ProcessPoolExecutor
+from random import choice
+from typing import Optional
+
+from config import BOT_THINK_TIME, BOT_WORKERS
+from metrics import Histogram
+from schemas.user import User
+
+from .foot_game import FootGame
+from .player import Player
+from .search import search
+
+BOT_ID_BASE = 1 << 52
+
+think_seconds = Histogram("footgame_bot_think_seconds", "Time a bot spent choosing a move, including executor wait.")
+executor: Optional[Executor] = None
+
+def make_bot(index: int) -> Player:
+    return Player(
+        user=User(
+            id=BOT_ID_BASE + index,
+            username=f"bot{index}",
+            display_name=f"機器人 {index}",
+            avatar_url=f"https://cdn.discordapp.com/embed/avatars/{index % 6}.png"
+        ),
+        bot=True
+    )
+
+def bot_view(game: FootGame, player: Player) -> tuple[int, int, bytes, int, int]:
+    board = game.map
+    blocked = bytes(map(
+        lambda index: board.has_bomb(index) or board.has_owner(index, player._seat),
+        range(board.width * board.height)
+    ))
+    return board.width, board.height, blocked, player.pos_x, player.pos_y
+
+def fallback_move(game: FootGame, player: Player) -> tuple[int, int]:
+    x, y = player.pos_x, player.pos_y
+    targets = list(filter(
+        lambda pos: game.map.contains(*pos),
+        [(x, y - 1), (x + 1, y), (x, y + 1), (x - 1, y)]
+    ))
+    return choice(list(filter(lambda pos: not game.map.has_bomb(game.map.index(*pos)), targets)) or targets)
+
+def get_executor() -> Optional[Executor]:
+    global executor
+    if executor is None and BOT_WORKERS > 0:
+        executor = ProcessPoolExecutor(max_workers=BOT_WORKERS)
+    return executor
+
+@think_seconds.timed
+async def think(game: FootGame, player: Player) -> tuple[int, int, bool]:
+    view = bot_view(game, player)
+    try:
+        target = await get_running_loop().run_in_executor(get_executor(), search, *view, BOT_THINK_TIME)
+    except:
+        target = None
+    x, y = fallback_move(game, player) if target is None else target
+    return x, y, player.bomb_count > 0 and game.check_around(player)
+
+def shutdown_bots():
+    global executor
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+        executor = None
@@ -0,0 +1,11 @@
+from typing import Iterable
+
+from .connection import encode
+from .player import Player
+
+def broadcast(players: Iterable[Player], data) -> list[Player]:
+    text = encode(data)
+    return list(filter(
+        lambda player: not player.send_text(data["type"], text),
+        players
+    ))
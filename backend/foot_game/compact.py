@@ -0,0 +1,38 @@
+from fastapi.websockets import WebSocket
+from orjson import dumps, loads
+
+from struct import pack, unpack_from
+from typing import Literal
+
+COMPACT_PROTOCOL = "footgame.compact"
+FRAME_KINDS = {
+    "DATA": 1,
+    "PATCH": 2,
+}
+BOMB_BIT = 0x80
+BLOCK_SIZE = 5
+
+WireFormat = Literal["json", "compact"]
+
+def negotiate(ws: WebSocket) -> WireFormat:
+    if COMPACT_PROTOCOL in ws.scope.get("subprotocols", []):
+        return "compact"
+    return "json"
+
+def pack_block(x: int, y: int, code: int) -> bytes:
+    return pack("<HHB", x, y, code)
+
+def pack_frame(frame_type: str, header: dict, body: bytes) -> bytes:
+    header = dumps(header)
+    return pack("<BI", FRAME_KINDS[frame_type], len(header)) + header + body
+
+def unpack_frame(data: bytes) -> tuple[str, dict, bytes]:
+    kind, length = unpack_from("<BI", data)
+    frame_type = next(filter(lambda item: item[1] == kind, FRAME_KINDS.items()))[0]
+    return frame_type, loads(data[5:5 + length]), data[5 + length:]
+
+def unpack_blocks(body: bytes) -> list[tuple[int, int, int]]:
+    return list(map(
+        lambda offset: unpack_from("<HHB", body, offset),
+        range(0, len(body), BLOCK_SIZE)
+    ))
@@ -0,0 +1,150 @@
+from fastapi.websockets import WebSocket, WebSocketState
+from orjson import dumps
+
+from asyncio import Event, Task, TimeoutError, create_task, sleep, wait_for
+from collections import deque
+from time import perf_counter
+from typing import Literal, Optional, Union
+from weakref import WeakSet
+
+from config import OUTBOUND_POLICY, OUTBOUND_QUEUE_SIZE, SEND_TIMEOUT
+from metrics import Counter, Gauge, Histogram
+
+from .trace import Tracer
+
+FRAME_TYPES = ("DATA", "PATCH")
+DROPPABLE_TYPES = ("INFO",)
+
+connections: WeakSet["Connection"] = WeakSet()
+counters = {
+    "sent": 0,
+    "dropped": 0,
+    "coalesced": 0,
+    "disconnected": 0,
+}
+
+send_seconds = Histogram("footgame_send_seconds", "Time spent writing one frame to a WebSocket.")
+Gauge("footgame_sockets", "Open outbound WebSocket connections.", callback=lambda: len(connections))
+Gauge("footgame_outbound_depth", "Frames waiting in outbound queues.", callback=lambda: sum(map(lambda connection: len(connection.queue), connections)))
+Counter("footgame_outbound_frames_total", "Outbound frames by outcome.", ("result",), callback=lambda: dict(map(lambda item: ((item[0],), item[1]), counters.items())))
+
+def encode(data) -> str:
+    return dumps(data).decode()
+
+def queue_stats() -> dict:
+    depths = list(map(lambda connection: len(connection.queue), connections))
+    return {
+        "connections": len(depths),
+        "depth": sum(depths),
+        "max_depth": max(depths, default=0),
+        "peak_depth": max(map(lambda connection: connection.peak_depth, connections), default=0),
+        **counters
+    }
+
+class Connection():
+    ws: WebSocket
+    queue: deque[tuple[str, Union[str, bytes]]]
+    max_size: int
+    policy: Literal["coalesce", "drop", "disconnect"]
+    closed: bool = False
+    peak_depth: int = 0
+    writer: Task
+    event: Event
+    tracer: Optional[Tracer] = None
+    user_id: int = 0
+    stale: bool = False
+
+    def __init__(
+        self,
+        ws: WebSocket,
+        max_size: int = OUTBOUND_QUEUE_SIZE,
+        policy: Literal["coalesce", "drop", "disconnect"] = OUTBOUND_POLICY
+    ) -> None:
+        self.ws = ws
+        self.queue = deque()
+        self.max_size = max_size
+        self.policy = policy
+        self.closed = False
+        self.peak_depth = 0
+        self.event = Event()
+        self.tracer = None
+        self.user_id = 0
+        self.stale = False
+        self.writer = create_task(self.write())
+        connections.add(self)
+
+    def put(self, frame_type: str, payload: Union[str, bytes]) -> bool:
+        if self.closed:
+            return False
+        if self.stale and frame_type == "PATCH":
+            counters["coalesced"] += 1
+            return False
+        if len(self.queue) >= self.max_size:
+            if self.policy == "coalesce":
+                if self.discard(FRAME_TYPES, "coalesced") > 0:
+                    self.stale = True
+                self.discard(DROPPABLE_TYPES, "dropped")
+                if self.stale and frame_type == "PATCH":
+                    counters["coalesced"] += 1
+                    return False
+            elif self.policy == "drop":
+                if frame_type in DROPPABLE_TYPES:
+                    counters["dropped"] += 1
+                    return False
+                self.discard(DROPPABLE_TYPES, "dropped")
+            if len(self.queue) >= self.max_size:
+                self.close()
+                counters["disconnected"] += 1
+                return False
+        if frame_type == "DATA":
+            self.stale = False
+        self.queue.append((frame_type, payload))
+        self.peak_depth = max(self.peak_depth, len(self.queue))
+        self.event.set()
+        return True
+
+    def discard(self, frame_types: tuple[str, ...], counter: str) -> int:
+        size = len(self.queue)
+        self.queue = deque(filter(lambda item: item[0] not in frame_types, self.queue))
+        counters[counter] += size - len(self.queue)
+        return size - len(self.queue)
+
+    async def write(self):
+        while not self.closed:
+            if len(self.queue) == 0:
+                self.event.clear()
+                await self.event.wait()
+                continue
+            frame_type, payload = self.queue.popleft()
+            try:
+                start = perf_counter()
+                if type(payload) == bytes:
+                    await wait_for(self.ws.send_bytes(payload), SEND_TIMEOUT)
+                else:
+                    await wait_for(self.ws.send_text(payload), SEND_TIMEOUT)
+                end = perf_counter()
+                send_seconds.observe(end - start)
+                if self.tracer is not None:
+                    self.tracer.record_write(self.user_id, start, end, frame_type)
+                counters["sent"] += 1
+            except TimeoutError:
+                counters["disconnected"] += 1
+                self.closed = True
+            except:
+                self.closed = True
+        self.queue.clear()
+        try:
+            if self.ws.client_state == WebSocketState.CONNECTED:
+                await wait_for(self.ws.close(code=1008), SEND_TIMEOUT)
+        except: pass
+
+    async def drain(self):
+        while not self.closed and len(self.queue) > 0:
+            await sleep(0.01)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.clear()
+        self.event.set()
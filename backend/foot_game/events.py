@@ -0,0 +1,45 @@
+from orjson import dumps, loads
+
+from struct import Struct
+from typing import Optional
+
+from .player import Player
+
+SETUP = 1
+MOVE = 2
+EXIT = 3
+TIMEOUT = 4
+END = 5
+
+MOVE_EVENT = Struct("<QHH?")
+PLAYER_EVENT = Struct("<Q")
+
+def encode_setup(setting: dict, host: Optional[Player], players: list[Player], now_player: Player) -> bytes:
+    return dumps({
+        "setting": setting,
+        "host": None if host is None else host.user.id,
+        "players": list(map(
+            lambda player: {
+                "user": player.user.model_dump(),
+                "observer": player.observer,
+                "bot": player.bot
+            },
+            players
+        )),
+        "now_player": now_player.user.id
+    })
+
+def decode_setup(payload: bytes) -> dict:
+    return loads(payload)
+
+def encode_move(player: Player, x: int, y: int, bomb: bool) -> bytes:
+    return MOVE_EVENT.pack(player.user.id, x, y, bomb)
+
+def decode_move(payload: bytes) -> tuple[int, int, int, bool]:
+    return MOVE_EVENT.unpack(payload)
+
+def encode_player(player: Optional[Player]) -> bytes:
+    return PLAYER_EVENT.pack(0 if player is None else player.user.id)
+
+def decode_player(payload: bytes) -> int:
+    return PLAYER_EVENT.unpack(payload)[0]
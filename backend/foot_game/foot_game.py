@@ -1,31 +1,51 @@
-from fastapi.websockets import WebSocket, WebSocketState
-from pydantic import BaseModel, ConfigDict
-
+from functools import partial
 from random import choice
-from typing import Optional
+from time import perf_counter, time
+from typing import Awaitable, Callable, Iterable, Optional, Union
 
-from schemas.user import User
+from config import TURN_FORFEIT_AFTER, TURN_TIMEOUT
+from metrics import Histogram
 
-class Player(BaseModel):
-    model_config=ConfigDict(arbitrary_types_allowed=True)
-    user: User
-    pos_x: Optional[int] = None
-    pos_y: Optional[int] = None
-    bomb_count: Optional[int] = None
-    observer: bool = False
-    live: bool = True
-    count: int = 0
-    ws: WebSocket
+from .board import Board
+from .broadcast import broadcast
+from .compact import BOMB_BIT, WireFormat, pack_block, pack_frame
+from .connection import encode
+from .events import END, EXIT, MOVE, TIMEOUT, encode_move, encode_player
+from .player import Player
+from .rules import BOMBED, STOMP, TRAMPLE, apply_move, next_player, seat_players, validate_move
+from .spatial import Occupancy
+from .spectators import SPECTATOR, Spectators
+from .timer import Timer, timer_wheel
+from .trace import Tracer, span
 
-class Block(BaseModel):
-    owners: list[Player] = []
-    has_bomb: bool = False
+move_seconds = Histogram("footgame_move_seconds", "Time spent applying a MOVE, including the resulting update.")
+map_seconds = Histogram("footgame_generate_map_seconds", "Time spent rendering a full map view.")
+update_seconds = Histogram("footgame_send_update_seconds", "Time spent rendering and queueing one update round.")
 
 class FootGame():
     end: bool = False
-    map: list[list[Block]] = []
+    map: Board
+    occupancy: Occupancy
     now_player: Optional[Player] = None
     players: list[Player] = []
+    version: int = 0
+    changed_blocks: dict[tuple[int, int], tuple[int, int]] = {}
+    changed_players: dict[int, Player] = {}
+    map_cache: dict[tuple[int, Union[str, int]], list] = {}
+    patch_cache: dict[tuple[int, Union[str, int]], dict] = {}
+    player_cache: dict[int, dict] = {}
+    compact_cache: dict[tuple[int, Union[str, int], str], tuple[list, bytes]] = {}
+    timer: Optional[Timer] = None
+    deadline: Optional[float] = None
+    timeouts: dict[int, int] = {}
+    on_timeout: Optional[Callable[[Player, float], Awaitable[None]]] = None
+    batching: bool = False
+    pending: bool = False
+    tracer: Optional[Tracer] = None
+    turn_timeout: float = TURN_TIMEOUT
+    recorder: Optional[Callable[[int, bytes], None]] = None
+    events: int = 0
+    spectators: Optional[Spectators] = None
 
     def __init__(
         self,
@@ -33,192 +53,493 @@ class FootGame():
         height: int,
         bomb_count: int,
         start_position: list[tuple[int, int]],
-        players: list[Player]
+        players: list[Player],
+        turn_timeout: float = TURN_TIMEOUT
     ) -> None:
-        self.map = list([])
         self.now_player = None
         self.players = list([])
         self.end = False
-        for _ in range(width):
-            self.map.append([])
-            for _ in range(height):
-                self.map[-1].append(Block())
-        for i, player in enumerate(filter(lambda player: not player.observer, players)):
-            player.bomb_count = bomb_count
-            player.pos_x, player.pos_y = start_position[i]
-            self.map[player.pos_x][player.pos_y].owners = [player]
-            player.count = 1
-        self.now_player = choice(list(filter(lambda player: not player.observer, players)))
+        self.version = 0
+        self.changed_blocks = {}
+        self.changed_players = {}
+        self.map_cache = {}
+        self.patch_cache = {}
+        self.player_cache = {}
+        self.compact_cache = {}
+        self.timer = None
+        self.deadline = None
+        self.timeouts = {}
+        self.on_timeout = None
+        self.batching = False
+        self.pending = False
+        self.tracer = None
+        self.turn_timeout = turn_timeout
+        self.recorder = None
+        self.events = 0
+        self.spectators = None
+        seats = list(filter(lambda player: not player.observer, players))
+        self.map = Board(width, height, seats)
+        self.occupancy = Occupancy()
+        seat_players(self.map, self.occupancy, seats, bomb_count, start_position)
+        self.now_player = choice(seats)
         
         self.players = players
     
+    @classmethod
+    def restore(cls, data: dict, players: list[Player]) -> "FootGame":
+        game = cls.__new__(cls)
+        game.players = players
+        game.end = data["end"]
+        game.version = data["version"]
+        game.changed_blocks = {}
+        game.changed_players = {}
+        game.map_cache = {}
+        game.patch_cache = {}
+        game.player_cache = {}
+        game.compact_cache = {}
+        seats = list(filter(lambda player: player._seat is not None, players))
+        seats += list(map(Player.load_state, data["departed"]))
+        seats.sort(key=lambda player: player._seat)
+        game.map = Board.load(data["board"], seats)
+        game.occupancy = Occupancy()
+        for player in seats:
+            if player.live and player in players:
+                game.occupancy.add(player)
+        game.now_player = next(filter(lambda player: player.user.id == data["now_player"], seats), None)
+        game.timer = None
+        game.deadline = None
+        game.timeouts = {}
+        game.on_timeout = None
+        game.batching = False
+        game.pending = False
+        game.tracer = None
+        game.turn_timeout = TURN_TIMEOUT
+        game.recorder = None
+        game.events = data.get("events", 0)
+        game.spectators = None
+        if not game.end and game.now_player is not None:
+            game.schedule_turn()
+        return game
+
+    def snapshot(self) -> dict:
+        return {
+            "end": self.end,
+            "version": self.version,
+            "events": self.events,
+            "now_player": None if self.now_player is None else self.now_player.user.id,
+            "departed": list(map(
+                lambda player: player.dump_state(),
+                filter(lambda player: player not in self.players, self.map.seats)
+            )),
+            "board": self.map.dump()
+        }
+
+    def span(self, name: str, **args):
+        return span(self.tracer, name, **args)
+
+    def record(self, kind: int, payload: bytes):
+        if self.recorder is None:
+            return
+        self.recorder(kind, payload)
+        self.events += 1
+
+    def watch(self, spectators: Spectators):
+        self.spectators = spectators
+        spectators.render = self.render_spectators
+
     async def broadcast(self, data):
-        for player in self.players:
-            try:
-                await player.ws.send_json(data)
-            except: pass
-    
+        broadcast(self.players, data)
+        if self.spectators is not None:
+            self.spectators.broadcast(data)
+
     async def exit(self, player: Player):
+        self.record(EXIT, encode_player(player))
+        self.occupancy.remove(player)
         live_players: list[Player] = list(filter(lambda player: player.live and not player.observer, self.players))
         if player == self.now_player and not self.end:
             now_index = live_players.index(player)
             self.now_player = live_players[(now_index + 1) % len(live_players)]
             self.players.remove(player)
+            self.stop()
             await self.next_round(False)
         else:
             self.players.remove(player)
             if (len(live_players) <= 2):
                 await self.next_round(False)
         player.live = False
+        self.changed_players[player.user.id] = player
 
 
+    @move_seconds.timed
     async def move(self, player: Player, target_x: int, target_y: int, bomb: bool):
         if self.end: return
-        if self.now_player != player:
-            await player.ws.send_json({
-                "type": "ERROR",
-                "data": "當前不是你的回合。"
+        with self.span("validate", user=player.user.id):
+            error = validate_move(self.map, self.now_player, player, target_x, target_y, bomb)
+            if error is not None:
+                player.send({
+                    "type": "ERROR",
+                    "data": error
+                })
+                return
+
+        with self.span("mutate", user=player.user.id):
+            self.record(MOVE, encode_move(player, target_x, target_y, bomb))
+            self.timeouts.pop(player.user.id, None)
+            self.changed_blocks.setdefault((target_x, target_y), self.map.state(self.map.index(target_x, target_y)))
+            self.changed_players[player.user.id] = player
+            outcome, owner = apply_move(self.map, self.occupancy, player, target_x, target_y, bomb)
+            await self.broadcast({
+                "type": "INFO",
+                "data": f"{player.user.display_name} 移動完成。 第 {player.count} 個 {player.user.display_name} 出現了。"
             })
+
+            if outcome == STOMP:
+                self.changed_players[owner.user.id] = owner
+                await self.broadcast({
+                    "type": "ERROR",
+                    "data": f"{owner.user.display_name} 被 {player.user.display_name} 踩死了。"
+                })
+            elif outcome == BOMBED:
+                await self.broadcast({
+                    "type": "ERROR",
+                    "data": f"{player.user.display_name} 被 {owner.user.display_name} 炸死了。"
+                })
+            elif outcome == TRAMPLE:
+                player.send({
+                    "type": "WARNING",
+                    "data": f"你踩到 {owner.user.display_name} 的足跡了。"
+                })
+                owner.send({
+                    "type": "WARNING",
+                    "data": f"你的足跡被 {player.user.display_name} 踩到了。"
+                })
+
+        with self.span("next_round"):
+            await self.next_round()
+
+    def schedule_turn(self):
+        self.stop()
+        if self.turn_timeout <= 0:
             return
-        elif abs(target_x - player.pos_x) + abs(target_y - player.pos_y) != 1:
-            await player.ws.send_json({
-                "type": "ERROR",
-                "data": "無法移動至該處。"
-            })
+        self.deadline = time() + self.turn_timeout
+        self.timer = timer_wheel.schedule(self.turn_timeout, partial(self.expire, self.now_player, self.deadline))
+
+    def stop(self):
+        timer_wheel.cancel(self.timer)
+        self.timer = None
+        self.deadline = None
+
+    async def expire(self, player: Player, deadline: float):
+        if self.on_timeout is None:
+            await self.timeout(player, deadline)
+        else:
+            await self.on_timeout(player, deadline)
+
+    async def timeout(self, player: Player, deadline: float):
+        if self.end or self.now_player != player or self.deadline != deadline:
             return
-        elif target_x < 0 or target_x >= len(self.map) or target_y < 0 or target_y >= len(self.map[0]):
-            await player.ws.send_json({
+        self.timer = None
+        self.record(TIMEOUT, encode_player(player))
+        count = self.timeouts.get(player.user.id, 0) + 1
+        self.timeouts[player.user.id] = count
+        if TURN_FORFEIT_AFTER > 0 and count >= TURN_FORFEIT_AFTER:
+            player.live = False
+            self.occupancy.remove(player)
+            self.changed_players[player.user.id] = player
+            await self.broadcast({
                 "type": "ERROR",
-                "data": "無法移動至該處。"
+                "data": f"{player.user.display_name} 多次超時，已被淘汰。"
             })
-            return
-        elif bomb:
-            if player.bomb_count == 0:
-                await player.ws.send_json({
-                    "type": "ERROR",
-                    "data": "地雷不足。"
-                })
-                return
-            player.bomb_count -= 1
-        
-        target_block = self.map[target_x][target_y]
-        player.pos_x = target_x
-        player.pos_y = target_y
-        player.count += 1
-        await self.broadcast({
-            "type": "INFO",
-            "data": f"{player.user.display_name} 移動完成。 第 {player.count} 個 {player.user.display_name} 出現了。"
-        })
-
-        if len(target_block.owners) == 0:
-            target_block.owners.append(player)
-            target_block.has_bomb = bomb
         else:
-            for owner in target_block.owners:
-                ox, oy = owner.pos_x, owner.pos_y
-                if ox == target_x and oy == target_y:
-                    owner.live = False
-                    await self.broadcast({
-                        "type": "ERROR",
-                        "data": f"{owner.user.display_name} 被 {player.user.display_name} 踩死了。"
-                    })
-                    target_block.owners = [player]
-                    target_block.has_bomb = bomb
-                    break
-                elif target_block.has_bomb:
-                    player.live = False
-                    target_block.has_bomb = False
-                    await self.broadcast({
-                        "type": "ERROR",
-                        "data": f"{player.user.display_name} 被 {owner.user.display_name} 炸死了。"
-                    })
-                    break
-                else:
-                    await player.ws.send_json({
-                        "type": "WARNING",
-                        "data": f"你踩到 {owner.user.display_name} 的足跡了。"
-                    })
-                    await owner.ws.send_json({
-                        "type": "WARNING",
-                        "data": f"你的足跡被 {player.user.display_name} 踩到了。"
-                    })
-                    target_block.owners.append(player)
-                    target_block.has_bomb = bomb
-                    break
-        
+            await self.broadcast({
+                "type": "WARNING",
+                "data": f"{player.user.display_name} 超時，跳過回合。"
+            })
         await self.next_round()
             
         
+    def view_of(self, player: Player) -> Union[str, int]:
+        if player.observer or not player.live or self.end:
+            return "all"
+        return player.user.id
+
+    def dump_player(self, player: Player) -> dict:
+        data = self.player_cache.get(player.user.id)
+        if data is None:
+            data = player.model_dump(exclude=["ws"])
+            self.player_cache[player.user.id] = data
+        return data
+
+    def dump_block(self, index: int, player: Optional[Player] = None):
+        if player is None:
+            owner = self.map.last_owner(index)
+            data = {
+                "owner": None if owner is None else self.dump_player(owner),
+                "has_bomb": self.map.has_bomb(index)
+            }
+        else:
+            data = {
+                "owner": self.dump_player(player) if self.map.has_owner(index, player._seat) else None,
+                "has_bomb": self.map.has_bomb(index)
+            }
+        return data
+
+    def block_changed(self, pos: tuple[int, int], player: Player) -> bool:
+        owners, bomb = self.changed_blocks[pos]
+        index = self.map.index(*pos)
+        return (
+            (owners >> player._seat) & 1 != (self.map.owners[index] >> player._seat) & 1 or
+            bomb != self.map.bombs[index]
+        )
+
+    def visible_blocks(self, player: Optional[Player] = None) -> list[tuple[int, int]]:
+        if player is None:
+            return sorted(self.changed_blocks)
+        return sorted(filter(lambda pos: self.block_changed(pos, player), self.changed_blocks))
+
+    @map_seconds.timed
     def generate_map(self, player: Player):
-        def dump_block(block: Block, player: Optional[Player] = None):
-            if player is None:
-                data = {
-                    "owner": None if len(block.owners) == 0 else block.owners[-1].model_dump(exclude=["ws"]),
-                    "has_bomb": block.has_bomb
-                }
-            else:
-                data = {
-                    "owner": None if player not in block.owners else player.model_dump(exclude=["ws"]),
-                    "has_bomb": block.has_bomb
+        view = self.view_of(player)
+        result = self.map_cache.get((self.version, view))
+        if result is not None:
+            return result
+
+        target = None if view == "all" else player
+        height = self.map.height
+        with self.span("generate_map", view=view):
+            result = list(map(
+                lambda x: list(map(
+                    lambda index: self.dump_block(index, target),
+                    range(x * height, (x + 1) * height)
+                )),
+                range(self.map.width)
+            ))
+        self.map_cache[(self.version, view)] = result
+        return result
+
+    def generate_patch(self, player: Player):
+        view = self.view_of(player)
+        result = self.patch_cache.get((self.version, view))
+        if result is not None:
+            return result
+
+        target = None if view == "all" else player
+        result = {
+            "blocks": list(map(
+                lambda pos: {
+                    "x": pos[0],
+                    "y": pos[1],
+                    **self.dump_block(self.map.index(*pos), target)
+                },
+                self.visible_blocks(target)
+            )),
+            "players": list(map(
+                self.dump_player,
+                filter(
+                    lambda other: view == "all" or other.user.id == view,
+                    self.changed_players.values()
+                )
+            ))
+        }
+        self.patch_cache[(self.version, view)] = result
+        return result
+
+    def generate_frame(self, player: Player, full: bool = False):
+        view = self.view_of(player)
+        if full or player._view != view:
+            frame = {
+                "type": "DATA",
+                "data": {
+                    "seq": self.version,
+                    "map": self.generate_map(player),
+                    "current_player": self.now_player.user.id,
+                    "deadline": self.deadline,
+                    "around": self.check_around(player),
+                    "player": self.dump_player(player)
                 }
-            return data
-        
-        if player.observer or not player.live or self.end:
-            return list(map(lambda line: list(map(dump_block, line)), self.map))
-        
+            }
+            player._view = view
+            return frame
+        return {
+            "type": "PATCH",
+            "data": {
+                "seq": self.version,
+                **self.generate_patch(player),
+                "current_player": self.now_player.user.id,
+                "deadline": self.deadline,
+                "around": self.check_around(player),
+                "player": self.dump_player(player)
+            }
+        }
+
+    def cell_code(self, index: int, player: Optional[Player] = None) -> int:
+        bomb = BOMB_BIT if self.map.has_bomb(index) else 0
+        if player is None:
+            return (self.map.last[index] + 1) | bomb
+        return (player._seat + 1 if self.map.has_owner(index, player._seat) else 0) | bomb
+
+    def palette(self, view: Union[str, int], players: Iterable[Player]) -> list:
         return list(map(
-            lambda line: list(map(
-                lambda b: dump_block(b, player),
-                line
-            )),
-            self.map
+            lambda other: [other._seat + 1, self.dump_player(other)],
+            filter(lambda other: view == "all" or other.user.id == view, players)
         ))
 
+    def generate_compact_body(self, player: Player, frame_type: str) -> tuple[list, bytes]:
+        view = self.view_of(player)
+        result = self.compact_cache.get((self.version, view, frame_type))
+        if result is not None:
+            return result
+
+        target = None if view == "all" else player
+        if frame_type == "DATA":
+            with self.span("generate_compact", view=view):
+                result = (
+                    self.palette(view, self.map.seats),
+                    bytes(map(
+                        lambda index: self.cell_code(index, target),
+                        range(self.map.width * self.map.height)
+                    ))
+                )
+        else:
+            result = (
+                self.palette(view, self.changed_players.values()),
+                b"".join(map(
+                    lambda pos: pack_block(*pos, self.cell_code(self.map.index(*pos), target)),
+                    self.visible_blocks(target)
+                ))
+            )
+        self.compact_cache[(self.version, view, frame_type)] = result
+        return result
+
+    def generate_compact(self, player: Player, full: bool = False) -> tuple[str, bytes]:
+        view = self.view_of(player)
+        frame_type = "DATA" if full or player._view != view else "PATCH"
+        player._view = view
+        palette, body = self.generate_compact_body(player, frame_type)
+        header = {
+            "seq": self.version,
+            "current_player": self.now_player.user.id,
+            "deadline": self.deadline,
+            "around": self.check_around(player),
+            "player": self.dump_player(player),
+            "palette": palette
+        }
+        if frame_type == "DATA":
+            header["width"] = self.map.width
+            header["height"] = self.map.height
+        return frame_type, pack_frame(frame_type, header, body)
+
+    def render_frame(self, player: Player, full: bool = False) -> tuple[str, Union[str, bytes]]:
+        if player._format == "compact":
+            return self.generate_compact(player, full)
+        frame = self.generate_frame(player, full)
+        return frame["type"], encode(frame)
+
+    def render_spectators(self, frame_type: str, wire: WireFormat, seq: int, blocks: list[tuple[int, int]], players: list[Player]) -> Union[str, bytes]:
+        header = {
+            "seq": seq,
+            "current_player": self.now_player.user.id,
+            "deadline": self.deadline,
+            "around": False,
+            "player": SPECTATOR.model_dump(exclude=["ws"])
+        }
+        if wire == "compact":
+            if frame_type == "DATA":
+                palette, body = self.generate_compact_body(SPECTATOR, "DATA")
+                header["width"] = self.map.width
+                header["height"] = self.map.height
+            else:
+                palette = self.palette("all", players)
+                body = b"".join(map(
+                    lambda pos: pack_block(*pos, self.cell_code(self.map.index(*pos))),
+                    blocks
+                ))
+            return pack_frame(frame_type, {**header, "palette": palette}, body)
+        if frame_type == "DATA":
+            data = {
+                **header,
+                "map": self.generate_map(SPECTATOR)
+            }
+        else:
+            data = {
+                **header,
+                "blocks": list(map(
+                    lambda pos: {
+                        "x": pos[0],
+                        "y": pos[1],
+                        **self.dump_block(self.map.index(*pos))
+                    },
+                    blocks
+                )),
+                "players": list(map(self.dump_player, players))
+            }
+        return encode({
+            "type": frame_type,
+            "data": data
+        })
+
     def check_around(self, player: Player) -> bool:
         if player.observer or not player.live:
             return False
-        for other in self.players:
-            if other == player: continue
-            if abs(other.pos_x - player.pos_x) == 1:
-                return True
-            if abs(other.pos_y - player.pos_y) == 1:
-                return True
-        return False
+        return self.occupancy.around(player)
 
     async def next_round(self, update: bool = True):
         players: list[Player] = list(filter(lambda player: not player.observer, self.players))
         live_players: list[Player] = list(filter(lambda player: player.live, players))
         if len(live_players) > 1:
             if update:
-                now_player_index = players.index(self.now_player) + 1
-                while not players[now_player_index % len(players)].live:
-                    now_player_index += 1
-                self.now_player = players[now_player_index % len(players)]
-            await self.now_player.ws.send_json({
+                self.now_player = next_player(players, self.now_player)
+            self.now_player.send({
                 "type": "INFO",
                 "data": "輪到你了。"
             })
         else:
+            ended = self.end
             self.end = True
             try:
                 self.now_player = live_players[0]
             except: pass
+            if not ended:
+                self.record(END, encode_player(live_players[0] if len(live_players) > 0 else None))
 
+        if self.end:
+            self.stop()
+        elif update or self.timer is None:
+            self.schedule_turn()
         await self.send_update()
     
+    async def send_snapshot(self, player: Player):
+        player.send_text(*self.render_frame(player, True))
+
+    async def flush(self):
+        if self.pending:
+            self.pending = False
+            await self.send_update()
+
     async def send_update(self):
+        self.map_cache.clear()
+        self.patch_cache.clear()
+        self.player_cache.clear()
+        self.compact_cache.clear()
+        if self.batching:
+            self.pending = True
+            return
+        start = perf_counter()
+        self.version += 1
         for player in self.players:
             try:
-                await player.ws.send_json({
-                    "type": "DATA",
-                    "data": {
-                        "map": self.generate_map(player),
-                        "current_player": self.now_player.user.id,
-                        "around": self.check_around(player),
-                        "player": player.model_dump(exclude=["ws"])
-                    }
-                })
+                with self.span("frame", user=player.user.id):
+                    frame_type, payload = self.render_frame(player)
+                with self.span("send", user=player.user.id, type=frame_type):
+                    if not player.send_text(frame_type, payload) and player._view is None:
+                        frame_type, payload = self.render_frame(player, True)
+                        player.send_text(frame_type, payload)
             except: pass
+        if self.spectators is not None:
+            self.spectators.publish(self.changed_blocks, self.changed_players.values())
+        self.changed_blocks.clear()
+        self.changed_players.clear()
+        update_seconds.observe(perf_counter() - start)
         if self.end:
             await self.broadcast({
                 "type": "END",
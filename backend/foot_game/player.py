@@ -0,0 +1,88 @@
+from fastapi.websockets import WebSocket
+from pydantic import BaseModel, ConfigDict, PrivateAttr
+
+from base64 import b64encode
+from typing import Optional, Union
+
+from bus import broadcast_bus
+from schemas.user import User
+
+from .compact import WireFormat
+from .connection import Connection, encode
+from .trace import Tracer
+
+class Player(BaseModel):
+    model_config=ConfigDict(arbitrary_types_allowed=True)
+    user: User
+    pos_x: Optional[int] = None
+    pos_y: Optional[int] = None
+    bomb_count: Optional[int] = None
+    observer: bool = False
+    bot: bool = False
+    live: bool = True
+    count: int = 0
+    ws: Optional[WebSocket] = None
+    _seat: Optional[int] = PrivateAttr(None)
+    _view: Union[str, int, None] = PrivateAttr(None)
+    _connection: Optional[Connection] = PrivateAttr(None)
+    _channel: Optional[str] = PrivateAttr(None)
+    _tracer: Optional[Tracer] = PrivateAttr(None)
+    _format: WireFormat = PrivateAttr("json")
+
+    @property
+    def connected(self) -> bool:
+        return self.ws is not None or self._channel is not None
+
+    def send(self, data) -> bool:
+        return self.send_text(data["type"], encode(data))
+
+    def send_text(self, frame_type: str, payload: Union[str, bytes]) -> bool:
+        if self.ws is None:
+            if self._channel is None:
+                return False
+            if type(payload) == bytes:
+                broadcast_bus.publish(self._channel, [frame_type, b64encode(payload).decode(), True])
+            else:
+                broadcast_bus.publish(self._channel, [frame_type, payload])
+            return True
+        if self._connection is None:
+            self._connection = Connection(self.ws)
+            self.trace(self._tracer)
+        if self._connection.put(frame_type, payload):
+            return True
+        if self._connection.stale:
+            self._view = None
+        return False
+
+    def attach(self, ws: Optional[WebSocket], channel: Optional[str] = None, wire: WireFormat = "json"):
+        self.close()
+        self.ws = ws
+        self._connection = None
+        self._channel = channel
+        self._view = None
+        self._format = wire
+
+    def trace(self, tracer: Optional[Tracer]):
+        self._tracer = tracer
+        if self._connection is not None:
+            self._connection.tracer = tracer
+            self._connection.user_id = self.user.id
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+        self._channel = None
+
+    def dump_state(self) -> dict:
+        return {
+            **self.model_dump(exclude=["ws"]),
+            "seat": self._seat
+        }
+
+    @classmethod
+    def load_state(cls, data: dict) -> "Player":
+        data = dict(data)
+        seat = data.pop("seat", None)
+        player = cls.model_validate(data)
+        player._seat = seat
+        return player
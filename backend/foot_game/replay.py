@@ -0,0 +1,58 @@
+from typing import Optional
+
+from config import TURN_TIMEOUT
+from schemas.user import User
+
+from .events import END, EXIT, MOVE, TIMEOUT, decode_move, decode_player
+from .foot_game import FootGame
+from .player import Player
+
+def setup_players(setup: dict) -> list[Player]:
+    return list(map(
+        lambda data: Player(
+            user=User.model_validate(data["user"]),
+            observer=data["observer"],
+            bot=data.get("bot", False),
+            live=not data["observer"]
+        ),
+        setup["players"]
+    ))
+
+def setup_game(setup: dict, players: list[Player]) -> FootGame:
+    game = FootGame(**setup["setting"], players=players, turn_timeout=0)
+    game.now_player = next(filter(lambda player: player.user.id == setup["now_player"], game.map.seats))
+    return game
+
+def find_player(players: list[Player], user_id: int) -> Optional[Player]:
+    return next(filter(lambda player: player.user.id == user_id, players), None)
+
+async def apply_event(game: FootGame, kind: int, payload: bytes):
+    if kind == MOVE:
+        user_id, x, y, bomb = decode_move(payload)
+        player = find_player(game.map.seats, user_id)
+        if player is not None:
+            await game.move(player, x, y, bomb)
+    elif kind == EXIT:
+        player = find_player(game.players, decode_player(payload))
+        if player is not None:
+            await game.exit(player)
+    elif kind == TIMEOUT:
+        player = find_player(game.map.seats, decode_player(payload))
+        if player is not None:
+            await game.timeout(player, game.deadline)
+
+def is_finished(events: list[tuple[int, bytes]]) -> bool:
+    return any(map(lambda event: event[0] == END, events))
+
+async def replay(setup: dict, events: list[tuple[int, bytes]], players: list[Player]) -> FootGame:
+    game = setup_game(setup, players)
+    game.batching = True
+    for kind, payload in events[1:]:
+        await apply_event(game, kind, payload)
+    game.batching = False
+    game.pending = False
+    game.events = len(events)
+    game.turn_timeout = TURN_TIMEOUT
+    if not game.end:
+        game.schedule_turn()
+    return game
@@ -0,0 +1,62 @@
+from typing import Optional
+
+from .board import Board
+from .player import Player
+from .spatial import Occupancy
+
+PLACE = 0
+STOMP = 1
+BOMBED = 2
+TRAMPLE = 3
+
+def seat_players(board: Board, occupancy: Occupancy, seats: list[Player], bomb_count: int, start_position: list[tuple[int, int]]):
+    for i, player in enumerate(seats):
+        player.bomb_count = bomb_count
+        player.pos_x, player.pos_y = start_position[i]
+        player._seat = i
+        occupancy.add(player)
+        board.reset(board.index(player.pos_x, player.pos_y), i, False)
+        player.count = 1
+
+def validate_move(board: Board, now_player: Player, player: Player, target_x: int, target_y: int, bomb: bool) -> Optional[str]:
+    if now_player != player:
+        return "當前不是你的回合。"
+    if abs(target_x - player.pos_x) + abs(target_y - player.pos_y) != 1:
+        return "無法移動至該處。"
+    if not board.contains(target_x, target_y):
+        return "無法移動至該處。"
+    if bomb and player.bomb_count == 0:
+        return "地雷不足。"
+    return None
+
+def apply_move(board: Board, occupancy: Occupancy, player: Player, target_x: int, target_y: int, bomb: bool) -> tuple[int, Optional[Player]]:
+    if bomb:
+        player.bomb_count -= 1
+    index = board.index(target_x, target_y)
+    player.pos_x = target_x
+    player.pos_y = target_y
+    player.count += 1
+    occupancy.add(player)
+
+    owner = board.first_owner(index)
+    if owner is None:
+        board.add(index, player._seat, bomb)
+        return PLACE, None
+    if owner.pos_x == target_x and owner.pos_y == target_y:
+        owner.live = False
+        occupancy.remove(owner)
+        board.reset(index, player._seat, bomb)
+        return STOMP, owner
+    if board.has_bomb(index):
+        player.live = False
+        occupancy.remove(player)
+        board.set_bomb(index, False)
+        return BOMBED, owner
+    board.add(index, player._seat, bomb)
+    return TRAMPLE, owner
+
+def next_player(seats: list[Player], now_player: Player) -> Player:
+    index = seats.index(now_player) + 1
+    while not seats[index % len(seats)].live:
+        index += 1
+    return seats[index % len(seats)]
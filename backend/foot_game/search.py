@@ -0,0 +1,133 @@
+from random import Random
+from time import perf_counter
+from typing import Optional
+
+CHECK_EVERY = 256
+
+zobrist_keys: dict[int, tuple[list[int], list[int]]] = {}
+
+class SearchTimeout(Exception):
+    pass
+
+def zobrist(size: int) -> tuple[list[int], list[int]]:
+    keys = zobrist_keys.get(size)
+    if keys is None:
+        random = Random(size)
+        keys = (
+            list(map(lambda _: random.getrandbits(64), range(size))),
+            list(map(lambda _: random.getrandbits(64), range(size)))
+        )
+        zobrist_keys[size] = keys
+    return keys
+
+class Search():
+    width: int
+    height: int
+    blocked: bytearray
+    neighbors: list[tuple[int, ...]]
+    visit_keys: list[int]
+    position_keys: list[int]
+    table: dict[int, tuple[int, int, int]]
+    deadline: float
+    nodes: int = 0
+    depth: int = 0
+
+    def __init__(self, width: int, height: int, blocked: bytes, deadline: float) -> None:
+        self.width = width
+        self.height = height
+        self.blocked = bytearray(blocked)
+        self.neighbors = list(map(self.adjacent, range(width * height)))
+        self.visit_keys, self.position_keys = zobrist(width * height)
+        self.table = {}
+        self.deadline = deadline
+        self.nodes = 0
+        self.depth = 0
+
+    def adjacent(self, index: int) -> tuple[int, ...]:
+        x, y = divmod(index, self.height)
+        return tuple(map(
+            lambda pos: pos[0] * self.height + pos[1],
+            filter(
+                lambda pos: 0 <= pos[0] < self.width and 0 <= pos[1] < self.height,
+                [(x, y - 1), (x + 1, y), (x, y + 1), (x - 1, y)]
+            )
+        ))
+
+    def moves(self, index: int) -> list[int]:
+        return list(filter(lambda target: not self.blocked[target], self.neighbors[index]))
+
+    def reach(self, index: int) -> int:
+        seen = {index}
+        stack = [index]
+        while len(stack) > 0:
+            for target in self.neighbors[stack.pop()]:
+                if not self.blocked[target] and target not in seen:
+                    seen.add(target)
+                    stack.append(target)
+        return len(seen) - 1
+
+    def value(self, index: int, key: int, depth: int) -> int:
+        self.nodes += 1
+        if self.nodes % CHECK_EVERY == 0 and perf_counter() > self.deadline:
+            raise SearchTimeout()
+        node = key ^ self.position_keys[index]
+        entry = self.table.get(node)
+        if entry is not None and entry[0] >= depth:
+            return entry[1]
+        if depth == 0:
+            best, best_move = self.reach(index), -1
+        else:
+            best, best_move = 0, -1
+            moves = self.moves(index)
+            if entry is not None and entry[2] in moves:
+                moves.remove(entry[2])
+                moves.insert(0, entry[2])
+            for target in moves:
+                self.blocked[target] = 1
+                try:
+                    result = 1 + self.value(target, key ^ self.visit_keys[target], depth - 1)
+                finally:
+                    self.blocked[target] = 0
+                if result > best:
+                    best, best_move = result, target
+        self.table[node] = (depth, best, best_move)
+        return best
+
+    def root(self, index: int, depth: int) -> list[tuple[int, int]]:
+        moves = self.moves(index)
+        entry = self.table.get(self.position_keys[index])
+        if entry is not None and entry[2] in moves:
+            moves.remove(entry[2])
+            moves.insert(0, entry[2])
+        results = []
+        for target in moves:
+            self.blocked[target] = 1
+            try:
+                results.append((1 + self.value(target, self.visit_keys[target], depth - 1), target))
+            finally:
+                self.blocked[target] = 0
+        if len(results) > 0:
+            value, target = max(results, key=lambda result: result[0])
+            self.table[self.position_keys[index]] = (depth, value, target)
+        return results
+
+    def run(self, index: int) -> Optional[int]:
+        free = self.reach(index)
+        best = None
+        for depth in range(1, free + 1):
+            try:
+                results = self.root(index, depth)
+            except SearchTimeout:
+                break
+            if len(results) == 0:
+                break
+            self.depth = depth
+            best = max(results, key=lambda result: (result[0], self.reach(result[1])))[1]
+            if max(map(lambda result: result[0], results)) < depth:
+                break
+        return best
+
+def search(width: int, height: int, blocked: bytes, x: int, y: int, budget: float) -> Optional[tuple[int, int]]:
+    engine = Search(width, height, blocked, perf_counter() + budget)
+    target = engine.run(x * height + y)
+    return None if target is None else divmod(target, height)
@@ -0,0 +1,113 @@
+from random import Random
+from typing import Callable, Optional
+
+from .board import Board
+from .rules import BOMBED, STOMP, apply_move, next_player, seat_players, validate_move
+from .spatial import Occupancy
+
+class SimUser():
+    id: int
+
+    def __init__(self, id: int) -> None:
+        self.id = id
+
+class SimPlayer():
+    user: SimUser
+    pos_x: Optional[int] = None
+    pos_y: Optional[int] = None
+    bomb_count: Optional[int] = None
+    observer: bool = False
+    live: bool = True
+    count: int = 0
+    _seat: Optional[int] = None
+
+    def __init__(self, user_id: int) -> None:
+        self.user = SimUser(user_id)
+        self.pos_x = None
+        self.pos_y = None
+        self.bomb_count = None
+        self.observer = False
+        self.live = True
+        self.count = 0
+        self._seat = None
+
+Policy = Callable[["Simulation", SimPlayer], tuple[int, int, bool]]
+
+def random_policy(bomb_rate: float = 0.2) -> Policy:
+    def policy(sim: "Simulation", player: SimPlayer) -> tuple[int, int, bool]:
+        targets = sim.targets(player)
+        safe = list(filter(
+            lambda pos: sim.map.first_owner(sim.map.index(*pos)) is not player,
+            targets
+        ))
+        x, y = sim.random.choice(safe or targets)
+        return x, y, player.bomb_count > 0 and sim.random.random() < bomb_rate
+    return policy
+
+class Simulation():
+    map: Board
+    occupancy: Occupancy
+    seats: list[SimPlayer]
+    now_player: SimPlayer
+    random: Random
+    end: bool = False
+    winner: Optional[SimPlayer] = None
+    turns: int = 0
+    stomps: int = 0
+    bombs: int = 0
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        bomb_count: int,
+        start_position: list[tuple[int, int]],
+        seed: Optional[int] = None
+    ) -> None:
+        self.random = Random(seed)
+        self.seats = list(map(SimPlayer, range(1, len(start_position) + 1)))
+        self.map = Board(width, height, self.seats)
+        self.occupancy = Occupancy()
+        seat_players(self.map, self.occupancy, self.seats, bomb_count, start_position)
+        self.now_player = self.random.choice(self.seats)
+        self.end = False
+        self.winner = None
+        self.turns = 0
+        self.stomps = 0
+        self.bombs = 0
+
+    def targets(self, player: SimPlayer) -> list[tuple[int, int]]:
+        x, y = player.pos_x, player.pos_y
+        return list(filter(
+            lambda pos: self.map.contains(*pos),
+            [(x, y - 1), (x + 1, y), (x, y + 1), (x - 1, y)]
+        ))
+
+    def move(self, target_x: int, target_y: int, bomb: bool) -> Optional[str]:
+        player = self.now_player
+        error = validate_move(self.map, self.now_player, player, target_x, target_y, bomb)
+        if error is not None:
+            return error
+        outcome, _ = apply_move(self.map, self.occupancy, player, target_x, target_y, bomb)
+        if outcome == STOMP:
+            self.stomps += 1
+        elif outcome == BOMBED:
+            self.bombs += 1
+        self.turns += 1
+        self.next_round()
+        return None
+
+    def next_round(self):
+        live_players = list(filter(lambda player: player.live, self.seats))
+        if len(live_players) > 1:
+            self.now_player = next_player(self.seats, self.now_player)
+        else:
+            self.end = True
+            self.winner = live_players[0] if len(live_players) > 0 else None
+
+    def run(self, policy: Optional[Policy] = None, max_turns: int = 10000) -> "Simulation":
+        policy = policy or random_policy()
+        while not self.end and self.turns < max_turns:
+            if self.move(*policy(self, self.now_player)) is not None:
+                break
+        return self
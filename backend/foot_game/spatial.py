@@ -0,0 +1,58 @@
+from typing import Literal
+
+from config import AROUND_NEIGHBORHOOD, AROUND_RADIUS
+
+from .player import Player
+
+def neighborhood(
+    kind: Literal["von_neumann", "moore"],
+    radius: int
+) -> list[tuple[int, int]]:
+    offsets = []
+    for dx in range(-radius, radius + 1):
+        for dy in range(-radius, radius + 1):
+            if dx == 0 and dy == 0:
+                continue
+            if kind == "von_neumann" and abs(dx) + abs(dy) > radius:
+                continue
+            offsets.append((dx, dy))
+    return offsets
+
+class Occupancy():
+    cells: dict[tuple[int, int], set[int]]
+    positions: dict[int, tuple[int, int]]
+    offsets: list[tuple[int, int]]
+
+    def __init__(
+        self,
+        kind: Literal["von_neumann", "moore"] = AROUND_NEIGHBORHOOD,
+        radius: int = AROUND_RADIUS
+    ) -> None:
+        self.cells = {}
+        self.positions = {}
+        self.offsets = neighborhood(kind, radius)
+
+    def add(self, player: Player):
+        self.remove(player)
+        pos = (player.pos_x, player.pos_y)
+        self.positions[player.user.id] = pos
+        self.cells.setdefault(pos, set()).add(player.user.id)
+
+    def remove(self, player: Player):
+        pos = self.positions.pop(player.user.id, None)
+        if pos is None:
+            return
+        ids = self.cells[pos]
+        ids.discard(player.user.id)
+        if len(ids) == 0:
+            del self.cells[pos]
+
+    def around(self, player: Player) -> bool:
+        pos = self.positions.get(player.user.id)
+        if pos is None:
+            return False
+        x, y = pos
+        for dx, dy in self.offsets:
+            if (x + dx, y + dy) in self.cells:
+                return True
+        return False
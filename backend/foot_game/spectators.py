@@ -0,0 +1,151 @@
+from asyncio import Task, TimerHandle, create_task, get_running_loop, sleep
+from collections import deque
+from time import monotonic
+from typing import Callable, Iterable, Optional, Union
+
+from config import SPECTATOR_CHUNK, SPECTATOR_INTERVAL
+from metrics import Counter
+from schemas.user import User
+
+from .compact import WireFormat
+from .connection import encode
+from .player import Player
+
+SPECTATOR = Player(
+    user=User(id=0, username="spectator", display_name="觀眾", avatar_url="https://cdn.discordapp.com/embed/avatars/0.png"),
+    observer=True,
+    live=False
+)
+
+MESSAGE_LIMIT = 64
+
+Renderer = Callable[[str, WireFormat, int, list[tuple[int, int]], list[Player]], Union[str, bytes]]
+
+frame_counter = Counter("footgame_spectator_frames_total", "Shared spectator frames rendered, by type.", ("type",))
+
+class Spectators():
+    players: dict[int, Player]
+    render: Optional[Renderer] = None
+    seq: int = 0
+    interval: float
+    chunk: int
+    changed_blocks: set[tuple[int, int]]
+    changed_players: dict[int, Player]
+    handle: Optional[TimerHandle] = None
+    task: Optional[Task] = None
+    sent: float = 0
+    pending: bool = False
+    messages: deque[tuple[str, str]]
+    frames: dict[tuple[int, str, str], Union[str, bytes]]
+
+    def __init__(self, interval: float = SPECTATOR_INTERVAL, chunk: int = SPECTATOR_CHUNK) -> None:
+        self.players = {}
+        self.render = None
+        self.seq = 0
+        self.interval = interval
+        self.chunk = max(chunk, 1)
+        self.changed_blocks = set()
+        self.changed_players = {}
+        self.handle = None
+        self.task = None
+        self.sent = 0
+        self.pending = False
+        self.messages = deque(maxlen=MESSAGE_LIMIT)
+        self.frames = {}
+
+    def __len__(self) -> int:
+        return len(self.players)
+
+    def __contains__(self, player: Player) -> bool:
+        return id(player) in self.players
+
+    def __iter__(self):
+        return iter(list(self.players.values()))
+
+    def add(self, player: Player):
+        player.observer = True
+        player.live = False
+        player._view = None
+        self.players[id(player)] = player
+        self.snapshot(player)
+
+    def remove(self, player: Player) -> bool:
+        return self.players.pop(id(player), None) is not None
+
+    def broadcast(self, data):
+        if len(self.players) == 0:
+            return
+        self.messages.append((data["type"], encode(data)))
+        self.schedule()
+
+    def frame(self, frame_type: str, wire: WireFormat, blocks: list[tuple[int, int]], players: list[Player]) -> Union[str, bytes]:
+        key = (self.seq, frame_type, wire)
+        payload = self.frames.get(key)
+        if payload is None:
+            payload = self.render(frame_type, wire, self.seq, blocks, players)
+            self.frames[key] = payload
+            frame_counter.inc(key=(frame_type,))
+        return payload
+
+    def snapshot(self, player: Player):
+        if self.render is None:
+            return
+        player.send_text("DATA", self.frame("DATA", player._format, [], []))
+        player._view = self.seq
+
+    def publish(self, blocks: Iterable[tuple[int, int]], players: Iterable[Player]):
+        self.changed_blocks.update(blocks)
+        for player in players:
+            self.changed_players[player.user.id] = player
+        self.frames.clear()
+        self.pending = True
+        if len(self.players) > 0:
+            self.schedule()
+
+    def schedule(self):
+        if self.handle is not None or self.task is not None:
+            return
+        delay = max(self.sent + self.interval - monotonic(), 0)
+        self.handle = get_running_loop().call_later(delay, self.start)
+
+    def start(self):
+        self.handle = None
+        self.task = create_task(self.send())
+
+    async def send(self):
+        try:
+            messages = list(self.messages)
+            self.messages.clear()
+            frame = self.pending and self.render is not None
+            if frame:
+                self.seq += 1
+                self.pending = False
+                blocks = sorted(self.changed_blocks)
+                players = list(self.changed_players.values())
+                self.changed_blocks = set()
+                self.changed_players = {}
+                self.frames.clear()
+            self.sent = monotonic()
+            for index, player in enumerate(list(self.players.values())):
+                if index > 0 and index % self.chunk == 0:
+                    await sleep(0)
+                for frame_type, text in messages:
+                    player.send_text(frame_type, text)
+                if not frame or player._view == self.seq:
+                    continue
+                frame_type = "PATCH" if player._view == self.seq - 1 else "DATA"
+                if not player.send_text(frame_type, self.frame(frame_type, player._format, blocks, players)) and player._view is None:
+                    player.send_text("DATA", self.frame("DATA", player._format, [], []))
+                player._view = self.seq
+        finally:
+            self.task = None
+            if (self.pending or len(self.messages) > 0) and len(self.players) > 0:
+                self.schedule()
+
+    def stop(self):
+        if self.handle is not None:
+            self.handle.cancel()
+            self.handle = None
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
@@ -0,0 +1,74 @@
+from asyncio import Task, TimerHandle, create_task, get_running_loop
+from math import ceil
+from typing import Awaitable, Callable, Optional
+
+from config import TIMER_SLOTS, TIMER_TICK
+from metrics import Gauge
+
+class Timer():
+    callback: Callable[[], Awaitable[None]]
+    slot: Optional[int] = None
+    rounds: int = 0
+
+    def __init__(self, callback: Callable[[], Awaitable[None]], slot: int, rounds: int) -> None:
+        self.callback = callback
+        self.slot = slot
+        self.rounds = rounds
+
+class TimerWheel():
+    tick: float
+    slots: list[set[Timer]]
+    cursor: int = 0
+    count: int = 0
+    next_at: float = 0
+    handle: Optional[TimerHandle] = None
+    tasks: set[Task]
+
+    def __init__(self, tick: float = TIMER_TICK, slots: int = TIMER_SLOTS) -> None:
+        self.tick = tick
+        self.slots = list(map(lambda _: set(), range(slots)))
+        self.cursor = 0
+        self.count = 0
+        self.next_at = 0
+        self.handle = None
+        self.tasks = set()
+
+    def schedule(self, delay: float, callback: Callable[[], Awaitable[None]]) -> Timer:
+        ticks = max(1, ceil(delay / self.tick))
+        timer = Timer(callback, (self.cursor + ticks) % len(self.slots), (ticks - 1) // len(self.slots))
+        self.slots[timer.slot].add(timer)
+        self.count += 1
+        if self.handle is None:
+            loop = get_running_loop()
+            self.next_at = loop.time() + self.tick
+            self.handle = loop.call_at(self.next_at, self.advance)
+        return timer
+
+    def cancel(self, timer: Optional[Timer]):
+        if timer is None or timer.slot is None:
+            return
+        self.slots[timer.slot].discard(timer)
+        timer.slot = None
+        self.count -= 1
+
+    def advance(self):
+        self.cursor = (self.cursor + 1) % len(self.slots)
+        slot = self.slots[self.cursor]
+        for timer in list(slot):
+            if timer.rounds > 0:
+                timer.rounds -= 1
+                continue
+            slot.discard(timer)
+            timer.slot = None
+            self.count -= 1
+            task = create_task(timer.callback())
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+        if self.count > 0:
+            self.next_at += self.tick
+            self.handle = get_running_loop().call_at(self.next_at, self.advance)
+        else:
+            self.handle = None
+
+timer_wheel = TimerWheel()
+Gauge("footgame_timers", "Pending turn timers.", callback=lambda: timer_wheel.count)
@@ -0,0 +1,116 @@
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from time import perf_counter, time
+from typing import Optional
+
+from config import TRACE_LIMIT, TRACE_THRESHOLD
+
+NO_SPAN = nullcontext()
+
+class Span():
+    name: str
+    start: float
+    end: float = 0
+    args: dict
+    children: list["Span"]
+    track: int = 0
+
+    def __init__(self, name: str, start: float, args: dict, track: int = 0) -> None:
+        self.name = name
+        self.start = start
+        self.end = 0
+        self.args = args
+        self.children = []
+        self.track = track
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+    def dump(self, origin: float) -> dict:
+        return {
+            "name": self.name,
+            "start": self.start - origin,
+            "duration": self.duration,
+            "args": self.args,
+            "children": list(map(lambda child: child.dump(origin), self.children))
+        }
+
+    def events(self, origin: float) -> list[dict]:
+        result = [{
+            "name": self.name,
+            "ph": "X",
+            "ts": (self.start - origin) * 1e6,
+            "dur": self.duration * 1e6,
+            "pid": 1,
+            "tid": self.track,
+            "args": self.args
+        }]
+        for child in self.children:
+            result.extend(child.events(origin))
+        return result
+
+class Tracer():
+    threshold: float
+    traces: deque[Span]
+    writes: deque[Span]
+    stack: list[Span]
+    epoch: float
+    origin: float
+
+    def __init__(self, threshold: float = TRACE_THRESHOLD, limit: int = TRACE_LIMIT) -> None:
+        self.threshold = threshold
+        self.traces = deque(maxlen=limit)
+        self.writes = deque(maxlen=limit * 64)
+        self.stack = []
+        self.epoch = time()
+        self.origin = perf_counter()
+
+    @contextmanager
+    def span(self, name: str, **args):
+        span = Span(name, perf_counter(), args)
+        parent = self.stack[-1] if len(self.stack) > 0 else None
+        self.stack.append(span)
+        try:
+            yield span
+        finally:
+            span.end = perf_counter()
+            self.stack.pop()
+            if parent is not None:
+                parent.children.append(span)
+            elif span.duration >= self.threshold:
+                self.traces.append(span)
+
+    def record_write(self, user_id: int, start: float, end: float, frame_type: str):
+        span = Span("write", start, {"user": user_id, "type": frame_type}, user_id)
+        span.end = end
+        self.writes.append(span)
+
+    def dump(self) -> list[dict]:
+        return list(map(lambda span: {
+            "at": self.epoch + span.start - self.origin,
+            **span.dump(span.start)
+        }, self.traces))
+
+    def chrome_trace(self) -> dict:
+        events: list[dict] = []
+        for span in self.traces:
+            events.extend(span.events(self.origin))
+        for span in self.writes:
+            events.extend(span.events(self.origin))
+        events.extend(map(lambda track: {
+            "name": "thread_name",
+            "ph": "M",
+            "pid": 1,
+            "tid": track,
+            "args": {"name": "room" if track == 0 else f"ws {track}"}
+        }, sorted(set(map(lambda event: event["tid"], events)))))
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms"
+        }
+
+def span(tracer: Optional[Tracer], name: str, **args):
+    if tracer is None:
+        return NO_SPAN
+    return tracer.span(name, **args)
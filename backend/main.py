@@ -1,11 +1,28 @@
-from api import run as run_api
+from api import run as run_api, run_gateway, set_shard
 
 from asyncio import get_event_loop, run
+from multiprocessing import Process
+
+from config import SHARD_COUNT, SHARD_HOST, SHARD_PORT
+
+async def shard_main(index: int):
+    set_shard(index)
+    loop = get_event_loop()
+
+    await run_api(loop, host=SHARD_HOST, port=SHARD_PORT + index)
+
+def start_shard(index: int):
+    run(main=shard_main(index))
 
 async def main():
     loop = get_event_loop()
 
-    await run_api(loop)
+    if SHARD_COUNT > 0:
+        for index in range(SHARD_COUNT):
+            Process(target=start_shard, args=(index,), daemon=True).start()
+        await run_gateway(loop)
+    else:
+        await run_api(loop)
 
 if __name__ == "__main__":
     run(main=main())
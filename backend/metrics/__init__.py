@@ -0,0 +1 @@
+from .metrics import Counter, Gauge, Histogram, Registry, registry
\ No newline at end of file
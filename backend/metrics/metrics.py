@@ -0,0 +1,187 @@
+from bisect import bisect_left
+from functools import wraps
+from inspect import iscoroutinefunction
+from math import inf
+from time import perf_counter
+from typing import Callable, Optional, Union
+
+from config import METRICS
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+Callback = Callable[[], Union[float, dict[tuple[str, ...], float]]]
+
+def format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = list(map(lambda item: f'{item[0]}="{item[1]}"', zip(names, values)))
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if len(pairs) > 0 else ""
+
+def format_value(value: float) -> str:
+    if value == inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Registry():
+    enabled: bool
+    metrics: list["Metric"]
+
+    def __init__(self, enabled: bool = METRICS) -> None:
+        self.enabled = enabled
+        self.metrics = []
+
+    def register(self, metric: "Metric"):
+        self.metrics.append(metric)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+class Bound():
+    metric: "Metric"
+    key: tuple[str, ...]
+
+    def __init__(self, metric: "Metric", key: tuple[str, ...]) -> None:
+        self.metric = metric
+        self.key = key
+
+    def inc(self, amount: float = 1):
+        self.metric.inc(amount, self.key)
+
+    def set(self, value: float):
+        self.metric.set(value, self.key)
+
+    def observe(self, value: float):
+        self.metric.observe(value, self.key)
+
+    def timed(self, func):
+        return self.metric.timed(func, self.key)
+
+class Metric():
+    kind: str = "untyped"
+    name: str
+    help: str
+    label_names: tuple[str, ...]
+    callback: Optional[Callback] = None
+    enabled: bool
+    values: dict[tuple[str, ...], float]
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        callback: Optional[Callback] = None,
+        registry: Registry = registry
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.callback = callback
+        self.enabled = registry.enabled
+        self.values = {}
+        registry.register(self)
+
+    def labels(self, *values: str) -> Bound:
+        return Bound(self, tuple(map(str, values)))
+
+    def collect(self) -> dict[tuple[str, ...], float]:
+        if self.callback is None:
+            return self.values
+        value = self.callback()
+        return value if isinstance(value, dict) else {(): value}
+
+    def render(self) -> list[str]:
+        return list(map(
+            lambda item: f"{self.name}{format_labels(self.label_names, item[0])} {format_value(item[1])}",
+            self.collect().items()
+        ))
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, key: tuple[str, ...] = ()):
+        if not self.enabled:
+            return
+        self.values[key] = self.values.get(key, 0) + amount
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, key: tuple[str, ...] = ()):
+        if not self.enabled:
+            return
+        self.values[key] = value
+
+    def inc(self, amount: float = 1, key: tuple[str, ...] = ()):
+        if not self.enabled:
+            return
+        self.values[key] = self.values.get(key, 0) + amount
+
+class Histogram(Metric):
+    kind = "histogram"
+    buckets: tuple[float, ...]
+    states: dict[tuple[str, ...], list]
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+        registry: Registry = registry
+    ) -> None:
+        super().__init__(name, help, labels, None, registry)
+        self.buckets = tuple(buckets) + (inf,)
+        self.states = {}
+
+    def observe(self, value: float, key: tuple[str, ...] = ()):
+        if not self.enabled:
+            return
+        state = self.states.get(key)
+        if state is None:
+            state = [[0] * len(self.buckets), 0.0, 0]
+            self.states[key] = state
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def timed(self, func, key: tuple[str, ...] = ()):
+        if not self.enabled:
+            return func
+        if iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    self.observe(perf_counter() - start, key)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.observe(perf_counter() - start, key)
+        return wrapper
+
+    def render(self) -> list[str]:
+        lines: list[str] = []
+        for key, (counts, total, count) in self.states.items():
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                le = 'le="' + format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{format_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.label_names, key)} {format_value(total)}")
+            lines.append(f"{self.name}_count{format_labels(self.label_names, key)} {count}")
+        return lines
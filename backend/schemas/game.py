@@ -0,0 +1,27 @@
+from pydantic import BaseModel, Field, TypeAdapter
+
+from typing import Annotated, Literal, Union
+
+class MoveData(BaseModel):
+    x: int
+    y: int
+    bomb: bool = False
+
+class StartMessage(BaseModel):
+    type: Literal["START"]
+
+class BotMessage(BaseModel):
+    type: Literal["BOT"]
+
+class MoveMessage(BaseModel):
+    type: Literal["MOVE"]
+    data: MoveData
+
+class ResyncMessage(BaseModel):
+    type: Literal["RESYNC"]
+
+InboundMessage = Annotated[
+    Union[StartMessage, BotMessage, MoveMessage, ResyncMessage],
+    Field(discriminator="type")
+]
+inbound_adapter: TypeAdapter[InboundMessage] = TypeAdapter(InboundMessage)
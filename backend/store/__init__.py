@@ -0,0 +1,3 @@
+from .game_log import GameLog
+from .room_store import RoomStore, MemoryRoomStore, RedisRoomStore, get_room_store
+from .user_store import UserStore, FileUserStore, LogUserStore, get_user_store
\ No newline at end of file
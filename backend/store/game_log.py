@@ -0,0 +1,175 @@
+from aiofile import async_open
+
+from asyncio import Lock, Task, create_task, get_running_loop
+from collections import OrderedDict
+from os import O_CREAT, O_RDWR, close, fsync, ftruncate, listdir, makedirs, open as open_fd, pwrite, read, remove
+from os.path import getmtime, isdir, isfile, join, splitext
+from struct import Struct
+from time import monotonic, time
+
+from config import DATA_DIR, GAME_LOG_FSYNC, GAME_LOG_INTERVAL, GAME_LOG_RETENTION
+
+GAME_DIR = join(DATA_DIR, "games")
+HEADER = Struct("<IB")
+
+def parse_records(content: bytes) -> tuple[list[tuple[int, bytes]], int]:
+    records = []
+    offset = 0
+    while offset + HEADER.size <= len(content):
+        length, kind = HEADER.unpack_from(content, offset)
+        end = offset + HEADER.size + length
+        if end > len(content):
+            break
+        records.append((kind, content[offset + HEADER.size:end]))
+        offset = end
+    return records, offset
+
+class GameLog():
+    flush_interval: float
+    fsync: bool
+    retention: float
+    pending: dict[str, bytearray]
+    finished: set[str]
+    sizes: dict[str, int]
+    files: OrderedDict[str, int]
+    max_files: int
+    lock: Lock
+    tasks: set[Task]
+    scheduled: bool = False
+    swept: float = float("-inf")
+
+    def __init__(
+        self,
+        flush_interval: float = GAME_LOG_INTERVAL,
+        fsync: bool = GAME_LOG_FSYNC,
+        retention: float = GAME_LOG_RETENTION,
+        max_files: int = 256
+    ) -> None:
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.retention = retention
+        self.pending = {}
+        self.finished = set()
+        self.sizes = {}
+        self.files = OrderedDict()
+        self.max_files = max_files
+        self.lock = Lock()
+        self.tasks = set()
+        self.scheduled = False
+        self.swept = float("-inf")
+        if not isdir(GAME_DIR):
+            makedirs(GAME_DIR)
+
+    def path(self, room_id: str) -> str:
+        if not room_id.isalnum():
+            raise ValueError(f"Invalid room id: {room_id!r}")
+        return f"{join(GAME_DIR, room_id)}.log"
+
+    def append(self, room_id: str, kind: int, payload: bytes):
+        self.path(room_id)
+        buffer = self.pending.setdefault(room_id, bytearray())
+        buffer += HEADER.pack(len(payload), kind)
+        buffer += payload
+        if not self.scheduled:
+            self.scheduled = True
+            get_running_loop().call_later(self.flush_interval, self.schedule_flush)
+
+    def schedule_flush(self):
+        self.scheduled = False
+        task = create_task(self.flush())
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    def open_file(self, room_id: str) -> int:
+        fd = self.files.get(room_id)
+        if fd is not None:
+            self.files.move_to_end(room_id)
+            return fd
+        fd = open_fd(self.path(room_id), O_RDWR | O_CREAT, 0o644)
+        if room_id not in self.sizes:
+            content = bytearray()
+            while True:
+                chunk = read(fd, 1 << 16)
+                if len(chunk) == 0:
+                    break
+                content += chunk
+            _, size = parse_records(content)
+            if size < len(content):
+                ftruncate(fd, size)
+            self.sizes[room_id] = size
+        self.files[room_id] = fd
+        while len(self.files) > self.max_files:
+            _, old_fd = self.files.popitem(last=False)
+            close(old_fd)
+        return fd
+
+    def evict(self, room_id: str):
+        fd = self.files.pop(room_id, None)
+        if fd is not None:
+            close(fd)
+        self.sizes.pop(room_id, None)
+
+    def write(self, pending: dict[str, bytearray], finished: set[str]) -> dict[str, bytearray]:
+        failed = {}
+        for room_id, data in pending.items():
+            try:
+                fd = self.open_file(room_id)
+                pwrite(fd, data, self.sizes[room_id])
+                if self.fsync:
+                    fsync(fd)
+                self.sizes[room_id] += len(data)
+            except OSError:
+                failed[room_id] = data
+        for room_id in finished:
+            if room_id not in failed:
+                self.evict(room_id)
+        return failed
+
+    def sweep(self):
+        deadline = time() - self.retention
+        for name in listdir(GAME_DIR):
+            room_id, ext = splitext(name)
+            if ext != ".log" or room_id in self.sizes or room_id in self.pending:
+                continue
+            try:
+                if getmtime(join(GAME_DIR, name)) < deadline:
+                    remove(join(GAME_DIR, name))
+            except OSError:
+                pass
+
+    async def flush(self):
+        async with self.lock:
+            pending, self.pending = self.pending, {}
+            finished, self.finished = self.finished, set()
+            if len(pending) > 0 or len(finished) > 0:
+                failed = await get_running_loop().run_in_executor(None, self.write, pending, finished)
+                for room_id, data in failed.items():
+                    self.pending[room_id] = data + self.pending.get(room_id, bytearray())
+                    if room_id in finished:
+                        self.finished.add(room_id)
+            if self.retention > 0 and monotonic() - self.swept >= self.retention / 10:
+                self.swept = monotonic()
+                await get_running_loop().run_in_executor(None, self.sweep)
+
+    async def release(self, room_id: str):
+        self.finished.add(room_id)
+        await self.flush()
+
+    async def close(self):
+        await self.flush()
+        for fd in self.files.values():
+            close(fd)
+        self.files.clear()
+
+    async def read(self, room_id: str) -> list[tuple[int, bytes]]:
+        try:
+            path = self.path(room_id)
+        except ValueError:
+            return []
+        if room_id in self.pending:
+            await self.flush()
+        if not isfile(path):
+            return []
+        async with async_open(path, "rb") as log_file:
+            records, _ = parse_records(await log_file.read())
+        return records
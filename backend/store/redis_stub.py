@@ -0,0 +1,99 @@
+from asyncio import StreamReader, StreamWriter, run, start_server
+from sys import argv
+from time import monotonic
+from typing import Optional
+
+from .resp import RespError, read_reply
+
+def encode_array(*items: bytes) -> bytes:
+    return b"*%d\r\n" % len(items) + b"".join(map(lambda item: b"$%d\r\n%s\r\n" % (len(item), item), items))
+
+class RedisStub():
+    data: dict[bytes, tuple[Optional[float], bytes]]
+    channels: dict[bytes, set[StreamWriter]]
+
+    def __init__(self) -> None:
+        self.data = {}
+        self.channels = {}
+
+    def lookup(self, key: bytes) -> Optional[bytes]:
+        item = self.data.get(key)
+        if item is None:
+            return None
+        if item[0] is not None and item[0] <= monotonic():
+            del self.data[key]
+            return None
+        return item[1]
+
+    def execute(self, command: list[bytes], writer: StreamWriter) -> bytes:
+        name, args = command[0].upper(), command[1:]
+        if name == b"PING":
+            return b"+PONG\r\n"
+        if name == b"GET":
+            value = self.lookup(args[0])
+            return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+        if name == b"SET":
+            expire = None
+            if len(args) >= 4 and args[2].upper() == b"EX":
+                expire = monotonic() + int(args[3])
+            elif len(args) >= 4 and args[2].upper() == b"PX":
+                expire = monotonic() + int(args[3]) / 1000
+            self.data[args[0]] = (expire, args[1])
+            return b"+OK\r\n"
+        if name == b"DEL":
+            count = len(list(filter(lambda key: self.data.pop(key, None) is not None, args)))
+            return b":%d\r\n" % count
+        if name == b"EXPIRE":
+            value = self.lookup(args[0])
+            if value is None:
+                return b":0\r\n"
+            self.data[args[0]] = (monotonic() + int(args[1]), value)
+            return b":1\r\n"
+        if name == b"PUBLISH":
+            writers = self.channels.get(args[0], set())
+            for subscriber in writers:
+                subscriber.write(encode_array(b"message", args[0], args[1]))
+            return b":%d\r\n" % len(writers)
+        if name == b"SUBSCRIBE":
+            replies = []
+            for channel in args:
+                self.channels.setdefault(channel, set()).add(writer)
+                replies.append(encode_array(b"subscribe", channel, b"1"))
+            return b"".join(replies)
+        if name == b"UNSUBSCRIBE":
+            replies = []
+            for channel in args:
+                writers = self.channels.get(channel, set())
+                writers.discard(writer)
+                if len(writers) == 0:
+                    self.channels.pop(channel, None)
+                replies.append(encode_array(b"unsubscribe", channel, b"0"))
+            return b"".join(replies)
+        if name == b"PUBSUB" and len(args) > 0 and args[0].upper() == b"NUMSUB":
+            replies = []
+            for channel in args[1:]:
+                replies.append(b"$%d\r\n%s\r\n:%d\r\n" % (len(channel), channel, len(self.channels.get(channel, set()))))
+            return b"*%d\r\n" % (len(replies) * 2) + b"".join(replies)
+        return b"-ERR unknown command '%s'\r\n" % name
+
+    async def handle(self, reader: StreamReader, writer: StreamWriter):
+        try:
+            while True:
+                command = await read_reply(reader)
+                writer.write(self.execute(command, writer))
+                await writer.drain()
+        except (ConnectionError, EOFError, RespError):
+            pass
+        finally:
+            for writers in self.channels.values():
+                writers.discard(writer)
+            writer.close()
+
+async def serve(host: str, port: int):
+    stub = RedisStub()
+    server = await start_server(stub.handle, host, port)
+    async with server:
+        await server.serve_forever()
+
+if __name__ == "__main__":
+    run(serve("127.0.0.1", int(argv[1]) if len(argv) > 1 else 6379))
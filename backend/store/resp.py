@@ -0,0 +1,75 @@
+from asyncio import Lock, StreamReader, StreamWriter, open_connection
+from typing import Optional, Union
+
+class RespError(Exception):
+    pass
+
+def encode_command(*args: Union[str, bytes, int]) -> bytes:
+    parts = [f"*{len(args)}\r\n".encode()]
+    for arg in args:
+        if isinstance(arg, int):
+            arg = str(arg)
+        if isinstance(arg, str):
+            arg = arg.encode()
+        parts.append(f"${len(arg)}\r\n".encode())
+        parts.append(arg)
+        parts.append(b"\r\n")
+    return b"".join(parts)
+
+async def read_reply(reader: StreamReader):
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Connection closed.")
+    prefix, body = line[:1], line[1:-2]
+    if prefix == b"+":
+        return body.decode()
+    if prefix == b"-":
+        raise RespError(body.decode())
+    if prefix == b":":
+        return int(body)
+    if prefix == b"$":
+        size = int(body)
+        if size == -1:
+            return None
+        data = await reader.readexactly(size + 2)
+        return data[:-2]
+    if prefix == b"*":
+        size = int(body)
+        if size == -1:
+            return None
+        return [await read_reply(reader) for _ in range(size)]
+    raise RespError(f"Unknown reply: {line!r}")
+
+class RespClient():
+    host: str
+    port: int
+    reader: Optional[StreamReader] = None
+    writer: Optional[StreamWriter] = None
+    lock: Lock
+
+    def __init__(self, host: str, port: int) -> None:
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+        self.lock = Lock()
+
+    async def execute(self, *args: Union[str, bytes, int]):
+        async with self.lock:
+            for retry in (True, False):
+                try:
+                    if self.writer is None:
+                        self.reader, self.writer = await open_connection(self.host, self.port)
+                    self.writer.write(encode_command(*args))
+                    await self.writer.drain()
+                    return await read_reply(self.reader)
+                except (ConnectionError, EOFError, OSError):
+                    self.close()
+                    if not retry:
+                        raise
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = None
+        self.writer = None
@@ -0,0 +1,98 @@
+from abc import ABC, abstractmethod
+from time import monotonic
+from typing import Optional
+
+from config import ROOM_STORE, ROOM_STORE_HOST, ROOM_STORE_PORT, ROOM_TTL
+
+from .resp import RespClient
+
+class RoomStore(ABC):
+    ttl: int
+
+    def __init__(self, ttl: int = ROOM_TTL) -> None:
+        self.ttl = ttl
+
+    @abstractmethod
+    async def get(self, room_id: str) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    async def set(self, room_id: str, data: bytes):
+        pass
+
+    @abstractmethod
+    async def touch(self, room_id: str):
+        pass
+
+    @abstractmethod
+    async def delete(self, room_id: str):
+        pass
+
+class MemoryRoomStore(RoomStore):
+    rooms: dict[str, tuple[float, bytes]]
+    last_sweep: float
+
+    def __init__(self, ttl: int = ROOM_TTL) -> None:
+        super().__init__(ttl)
+        self.rooms = {}
+        self.last_sweep = monotonic()
+
+    def sweep(self):
+        now = monotonic()
+        if now - self.last_sweep < self.ttl / 10:
+            return
+        self.last_sweep = now
+        expired = list(filter(lambda item: item[1][0] <= now, self.rooms.items()))
+        for room_id, _ in expired:
+            del self.rooms[room_id]
+
+    async def get(self, room_id: str) -> Optional[bytes]:
+        item = self.rooms.get(room_id)
+        if item is None:
+            return None
+        if item[0] <= monotonic():
+            del self.rooms[room_id]
+            return None
+        return item[1]
+
+    async def set(self, room_id: str, data: bytes):
+        self.sweep()
+        self.rooms[room_id] = (monotonic() + self.ttl, data)
+
+    async def touch(self, room_id: str):
+        item = self.rooms.get(room_id)
+        if item is not None:
+            self.rooms[room_id] = (monotonic() + self.ttl, item[1])
+
+    async def delete(self, room_id: str):
+        self.rooms.pop(room_id, None)
+
+class RedisRoomStore(RoomStore):
+    client: RespClient
+    prefix: str = "room:"
+
+    def __init__(
+        self,
+        host: str = ROOM_STORE_HOST,
+        port: int = ROOM_STORE_PORT,
+        ttl: int = ROOM_TTL
+    ) -> None:
+        super().__init__(ttl)
+        self.client = RespClient(host, port)
+
+    async def get(self, room_id: str) -> Optional[bytes]:
+        return await self.client.execute("GET", self.prefix + room_id)
+
+    async def set(self, room_id: str, data: bytes):
+        await self.client.execute("SET", self.prefix + room_id, data, "EX", self.ttl)
+
+    async def touch(self, room_id: str):
+        await self.client.execute("EXPIRE", self.prefix + room_id, self.ttl)
+
+    async def delete(self, room_id: str):
+        await self.client.execute("DEL", self.prefix + room_id)
+
+def get_room_store() -> RoomStore:
+    if ROOM_STORE == "redis":
+        return RedisRoomStore()
+    return MemoryRoomStore()
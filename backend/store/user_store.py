@@ -0,0 +1,220 @@
+from aiofile import AIOFile, async_open
+from orjson import dumps, loads
+
+from abc import ABC, abstractmethod
+from asyncio import Lock, Task, create_task, get_running_loop
+from collections import OrderedDict
+from os import makedirs, replace
+from os.path import isdir, isfile, join
+from typing import Optional
+
+from config import DATA_DIR, USER_CACHE_SIZE, USER_FLUSH_INTERVAL, USER_FSYNC, USER_STORE
+from schemas.user import UserSecret
+
+USER_DIR = join(DATA_DIR, "users")
+MAX_RETRY_DELAY = 60
+
+class UserStore(ABC):
+    cache_size: int
+    flush_interval: float
+    fsync: bool
+    cache: OrderedDict[int, UserSecret]
+    dirty: dict[int, UserSecret]
+    flushing: dict[int, UserSecret]
+    lock: Lock
+    tasks: set[Task]
+    scheduled: bool = False
+    delay: float
+
+    def __init__(
+        self,
+        cache_size: int = USER_CACHE_SIZE,
+        flush_interval: float = USER_FLUSH_INTERVAL,
+        fsync: bool = USER_FSYNC
+    ) -> None:
+        self.cache_size = cache_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.cache = OrderedDict()
+        self.dirty = {}
+        self.flushing = {}
+        self.lock = Lock()
+        self.tasks = set()
+        self.scheduled = False
+        self.delay = flush_interval
+        if not isdir(USER_DIR):
+            makedirs(USER_DIR)
+
+    def remember(self, user_secret: UserSecret):
+        self.cache[user_secret.id] = user_secret
+        self.cache.move_to_end(user_secret.id)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    async def get(self, user_id: int) -> Optional[UserSecret]:
+        user_secret = self.dirty.get(user_id) or self.flushing.get(user_id) or self.cache.get(user_id)
+        if user_secret is not None:
+            self.remember(user_secret)
+            return user_secret
+        data = await self.read(user_id)
+        if data is None:
+            return None
+        user_secret = UserSecret.model_validate(loads(data))
+        self.remember(user_secret)
+        return user_secret
+
+    async def set(self, user_secret: UserSecret):
+        self.remember(user_secret)
+        self.dirty[user_secret.id] = user_secret
+        self.schedule()
+
+    def schedule(self):
+        if not self.scheduled:
+            self.scheduled = True
+            get_running_loop().call_later(self.delay, self.schedule_flush)
+
+    def schedule_flush(self):
+        self.scheduled = False
+        task = create_task(self.flush())
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def flush(self):
+        async with self.lock:
+            self.flushing, self.dirty = self.dirty, {}
+            if len(self.flushing) == 0:
+                return
+            try:
+                await self.write(list(map(
+                    lambda user_secret: (user_secret.id, dumps(user_secret.model_dump())),
+                    self.flushing.values()
+                )))
+                self.delay = self.flush_interval
+            except:
+                self.dirty = {**self.flushing, **self.dirty}
+                self.delay = min(max(self.delay * 2, 1), MAX_RETRY_DELAY)
+                self.schedule()
+            finally:
+                self.flushing = {}
+
+    async def close(self):
+        await self.flush()
+
+    @abstractmethod
+    async def read(self, user_id: int) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    async def write(self, records: list[tuple[int, bytes]]):
+        pass
+
+class FileUserStore(UserStore):
+    def path(self, user_id: int) -> str:
+        return f"{join(USER_DIR, str(user_id))}.json"
+
+    async def read(self, user_id: int) -> Optional[bytes]:
+        path = self.path(user_id)
+        if not isfile(path):
+            return None
+        async with async_open(path, "rb") as user_file:
+            return await user_file.read()
+
+    async def write(self, records: list[tuple[int, bytes]]):
+        for user_id, data in records:
+            path = self.path(user_id)
+            async with AIOFile(f"{path}.tmp", "wb") as user_file:
+                await user_file.write(data)
+                if self.fsync:
+                    await user_file.fsync()
+            replace(f"{path}.tmp", path)
+
+class LogUserStore(FileUserStore):
+    log_path: str
+    index: Optional[dict[int, tuple[int, int]]] = None
+    size: int = 0
+    records: int = 0
+
+    def __init__(
+        self,
+        cache_size: int = USER_CACHE_SIZE,
+        flush_interval: float = USER_FLUSH_INTERVAL,
+        fsync: bool = USER_FSYNC
+    ) -> None:
+        super().__init__(cache_size, flush_interval, fsync)
+        self.log_path = join(DATA_DIR, "users.log")
+        self.index = None
+        self.size = 0
+        self.records = 0
+
+    async def open(self):
+        index: dict[int, tuple[int, int]] = {}
+        size = 0
+        records = 0
+        if isfile(self.log_path):
+            async with async_open(self.log_path, "rb") as log_file:
+                content = await log_file.read()
+            while size < len(content):
+                end = content.find(b"\n", size)
+                if end == -1:
+                    break
+                try:
+                    user_id = loads(content[size:end])["id"]
+                except:
+                    break
+                index[user_id] = (size, end - size)
+                size = end + 1
+                records += 1
+            if size < len(content) or records > 2 * len(index):
+                await self.compact(content, index)
+                return
+        self.index, self.size, self.records = index, size, records
+
+    async def compact(self, content: bytes, index: dict[int, tuple[int, int]]):
+        compacted: dict[int, tuple[int, int]] = {}
+        size = 0
+        lines = []
+        for user_id, (offset, length) in index.items():
+            lines.append(content[offset:offset + length] + b"\n")
+            compacted[user_id] = (size, length)
+            size += length + 1
+        async with AIOFile(f"{self.log_path}.tmp", "wb") as log_file:
+            await log_file.write(b"".join(lines))
+            if self.fsync:
+                await log_file.fsync()
+        replace(f"{self.log_path}.tmp", self.log_path)
+        self.index, self.size, self.records = compacted, size, len(compacted)
+
+    async def read(self, user_id: int) -> Optional[bytes]:
+        if self.index is None:
+            async with self.lock:
+                if self.index is None:
+                    await self.open()
+        while True:
+            index = self.index
+            item = index.get(user_id)
+            if item is None:
+                return await super().read(user_id)
+            async with AIOFile(self.log_path, "rb") as log_file:
+                if self.index is index:
+                    return await log_file.read(item[1], item[0])
+
+    async def write(self, records: list[tuple[int, bytes]]):
+        if self.index is None:
+            await self.open()
+        data = b"".join(map(lambda record: record[1] + b"\n", records))
+        async with AIOFile(self.log_path, "r+b" if isfile(self.log_path) else "wb") as log_file:
+            await log_file.write(data, self.size)
+            if self.fsync:
+                await log_file.fsync()
+        for user_id, line in records:
+            self.index[user_id] = (self.size, len(line))
+            self.size += len(line) + 1
+            self.records += 1
+        if self.records > 2 * len(self.index) + 1024:
+            async with async_open(self.log_path, "rb") as log_file:
+                await self.compact(await log_file.read(), self.index)
+
+def get_user_store() -> UserStore:
+    if USER_STORE == "log":
+        return LogUserStore()
+    return FileUserStore()
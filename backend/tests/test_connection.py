@@ -0,0 +1,59 @@
+from fastapi.websockets import WebSocket
+from orjson import loads
+
+from asyncio import Event, sleep
+from unittest import IsolatedAsyncioTestCase, main
+
+from foot_game import Connection, FootGame, Player
+from schemas.user import User
+
+class StalledWebSocket(WebSocket):
+    def __init__(self) -> None:
+        self.gate = Event()
+        self.frames = []
+
+    async def send_text(self, data: str):
+        await self.gate.wait()
+        self.frames.append(loads(data))
+
+def make_player(user_id: int, ws: WebSocket) -> Player:
+    return Player(
+        user=User(id=user_id, username=f"user{user_id}", display_name=f"User {user_id}", avatar_url=""),
+        ws=ws
+    )
+
+class CoalesceTest(IsolatedAsyncioTestCase):
+    async def test_slow_client_is_coalesced_not_disconnected(self):
+        stalled = StalledWebSocket()
+        slow, other = make_player(1, stalled), make_player(2, StalledWebSocket())
+        slow._connection = Connection(stalled, max_size=8, policy="coalesce")
+        game = FootGame(8, 8, 0, [(0, 0), (7, 7)], [slow, other])
+        game.now_player = slow
+        for player in (slow, other):
+            await game.send_snapshot(player)
+
+        for step in range(1, 7):
+            await game.move(slow, 0, step, False)
+            await game.move(other, 7, 7 - step, False)
+        self.assertFalse(slow._connection.closed)
+        self.assertTrue(any(map(lambda item: item[0] == "INFO", slow._connection.queue)))
+
+        await game.send_snapshot(slow)
+        stalled.gate.set()
+        await sleep(0.1)
+        game.stop()
+
+        self.assertFalse(slow._connection.closed)
+        frames = list(filter(lambda frame: frame["type"] in ("DATA", "PATCH"), stalled.frames))
+        self.assertEqual(frames[-1]["type"], "DATA")
+        self.assertEqual(frames[-1]["data"]["seq"], game.version)
+        seq = None
+        for frame in frames:
+            if frame["type"] == "PATCH":
+                self.assertEqual(frame["data"]["seq"], seq + 1)
+            seq = frame["data"]["seq"]
+        slow.close()
+        other.close()
+
+if __name__ == "__main__":
+    main()
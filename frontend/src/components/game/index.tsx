@@ -17,6 +17,7 @@ import GameBlock from "./gameBlock";
 
 import {
     GameData,
+    GamePatch,
     GameUserData
 } from "../../schemas/game";
 import DataContext from "../../contexts/data";
@@ -29,6 +30,27 @@ export interface Message {
 };
 
 let ws: WebSocket | undefined;
+let seq: number | undefined;
+let resyncing = false;
+
+const applyPatch = (origin: GameData, patch: GamePatch): GameData => {
+    const players = new Map(patch.players.map(player => [player.user.id, player]));
+    const map = origin.map.map(line => line.map(block => {
+        const owner = block.owner && players.get(block.owner.user.id);
+        return owner ? { ...block, owner } : block;
+    }));
+    patch.blocks.forEach(({ x, y, owner, has_bomb }) => {
+        map[x][y] = { owner, has_bomb };
+    });
+    return {
+        seq: patch.seq,
+        map: map,
+        current_player: patch.current_player,
+        deadline: patch.deadline,
+        around: patch.around,
+        player: patch.player
+    };
+};
 
 const dealWs = (
     setGameData: Dispatch<SetStateAction<GameData | undefined>>,
@@ -37,14 +59,31 @@ const dealWs = (
 ) => {
     return (event: MessageEvent) => {
         const data: {
-            type: "DATA" | "USER" | "REJECT" | "INFO" | "WARNING" | "ERROR" | "END",
-            data: GameData | GameUserData | string
+            type: "DATA" | "PATCH" | "USER" | "REJECT" | "INFO" | "WARNING" | "ERROR" | "END",
+            data: GameData | GamePatch | GameUserData | string
         } = JSON.parse(event.data);
         console.log(data);
         switch (data.type) {
             case "DATA":
+                seq = (data.data as GameData).seq;
+                resyncing = false;
                 setGameData(data.data as GameData);
                 break;
+            case "PATCH": {
+                const patch = data.data as GamePatch;
+                if (seq === undefined || patch.seq !== seq + 1) {
+                    if (!resyncing) {
+                        ws?.send(JSON.stringify({
+                            "type": "RESYNC"
+                        }));
+                    }
+                    resyncing = true;
+                    break;
+                }
+                seq = patch.seq;
+                setGameData(origin => origin && applyPatch(origin, patch));
+                break;
+            }
             case "USER":
                 setUserData(data.data as GameUserData);
                 break;
@@ -106,6 +145,8 @@ export default function Game(): ReactElement {
     useEffect(() => () => {
         ws?.close();
         ws = undefined;
+        seq = undefined;
+        resyncing = false;
     }, []);
 
     const scrollPage = (page: number) => {
@@ -127,12 +168,20 @@ export default function Game(): ReactElement {
                     scrollPage={scrollPage}
                 /> : <div className="gameBlock">
                     <h3>Game</h3>
-                    {isHost ? <button className="wait" onClick={() => {
-                        if (ws === undefined) return;
-                        ws.send(JSON.stringify({
-                            "type": "START"
-                        }));
-                    }}>開始遊戲</button> : <div className="wait">等待房主開始遊戲...</div>}
+                    {isHost ? <>
+                        <button className="wait" onClick={() => {
+                            if (ws === undefined) return;
+                            ws.send(JSON.stringify({
+                                "type": "START"
+                            }));
+                        }}>開始遊戲</button>
+                        <button className="wait" onClick={() => {
+                            if (ws === undefined) return;
+                            ws.send(JSON.stringify({
+                                "type": "BOT"
+                            }));
+                        }}>加入機器人</button>
+                    </> : <div className="wait">等待房主開始遊戲...</div>}
                     <button className="pageButton" onClick={() => { scrollPage(1); }}>Next</button>
                 </div>
             }
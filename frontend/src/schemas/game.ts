@@ -17,8 +17,25 @@ export interface Block {
 }
 
 export interface GameData {
+    seq: number,
     map: Array<Array<Block>>,
     current_player: number,
+    deadline: number|null,
+    around: boolean,
+    player: Player
+};
+
+export interface BlockPatch extends Block {
+    x: number,
+    y: number
+}
+
+export interface GamePatch {
+    seq: number,
+    blocks: Array<BlockPatch>,
+    players: Array<Player>,
+    current_player: number,
+    deadline: number|null,
     around: boolean,
     player: Player
 };